@@ -1,20 +1,13 @@
 import streamlit as st
-from groq import Groq
 import requests
-import pandas as pd
 from datetime import datetime, timedelta
-import pycountry
-from fpdf import FPDF
-import io
-import base64
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
-import plotly.express as px
-import plotly.graph_objects as go
 import unicodedata
 import os
 from dotenv import load_dotenv
 
+# groq, pandas, plotly, pycountry and fpdf are imported where they are used so
+# a page only pays for the libraries it needs; sys.modules keeps them loaded
+
 # Load environment variables
 load_dotenv()
 
@@ -24,7 +17,10 @@ AIRVISUAL_API_KEY = os.getenv("AIRVISUAL_API_KEY")
 DEFAULT_MODEL = "llama3-70b-8192"
 
 # === INIT Groq CLIENT ===
-client = Groq(api_key=GROQ_API_KEY)
+@st.cache_resource
+def get_client():
+    from groq import Groq
+    return Groq(api_key=GROQ_API_KEY)
 
 # === PAGE CONFIG ===
 st.set_page_config(
@@ -329,6 +325,7 @@ def clean_text_for_pdf(text):
     return text
 
 def generate_pdf(chat_history, title="AI Climate & Farming Advice"):
+    from fpdf import FPDF
     pdf = FPDF()
     pdf.add_page()
 
@@ -360,7 +357,9 @@ def generate_pdf(chat_history, title="AI Climate & Farming Advice"):
     return pdf.output(dest="S").encode("latin-1", "replace")
 
 # === UTILS: Get Country List ===
+@st.cache_data
 def get_country_list():
+    import pycountry
     countries = [country.name for country in pycountry.countries]
     return sorted(countries)
 
@@ -401,7 +400,7 @@ if page == "AI Assistant Chat":
             # Add current user input
             messages.append({"role": "user", "content": user_input})
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model=DEFAULT_MODEL,
                 messages=messages,
             )
@@ -435,6 +434,9 @@ if page == "AI Assistant Chat":
 
 # === WEATHER DATA PAGE ===
 elif page == "Weather Data":
+    import pandas as pd
+    import plotly.graph_objects as go
+
     st.subheader("🌍 Advanced Weather & Environmental Data")
 
     location_method = st.radio(
@@ -594,6 +596,9 @@ elif page == "Weather Data":
 
 # === SMART FARMING CSV ANALYSIS PAGE ===
 elif page == "Smart Farming CSV Analysis":
+    import pandas as pd
+    import plotly.express as px
+
     st.subheader("🌱 AI-Powered Farming Data Analysis")
     uploaded_file = st.file_uploader("Upload your farming dataset (CSV)", type=["csv"])
 
@@ -681,7 +686,7 @@ elif page == "Smart Farming CSV Analysis":
                             }
                         ]
 
-                        response = client.chat.completions.create(
+                        response = get_client().chat.completions.create(
                             model=DEFAULT_MODEL,
                             messages=messages,
                             temperature=0.3
@@ -0,0 +1,134 @@
+import numpy as np
+
+# Solar constant (MJ m-2 min-1), FAO-56 eq. 21
+SOLAR_CONSTANT = 0.0820
+GDD_BASE_C = 10.0
+GDD_CAP_C = 30.0
+FROST_THRESHOLD_C = 0.0
+HEAT_STRESS_THRESHOLD_C = 35.0
+WATER_BALANCE_WINDOW = 7
+
+# All functions below work on arrays whose last axis is days; leading axes
+# (e.g. one row per farm) broadcast, so many farms are computed in one call.
+
+
+def _as_array(values):
+    """Convert an Open-Meteo list (which may contain None) to a float array"""
+    return np.array(values, dtype=np.float64)
+
+
+def growing_degree_days(tmax, tmin, base=GDD_BASE_C, cap=GDD_CAP_C):
+    """Daily growing degree days, capping Tmax at ``cap`` and flooring Tmin at ``base``"""
+    tmax = np.minimum(tmax, cap)
+    tmin = np.clip(tmin, base, cap)
+    return np.maximum((tmax + tmin) / 2 - base, 0.0)
+
+
+def extraterrestrial_radiation(latitude, day_of_year):
+    """Daily extraterrestrial radiation Ra (MJ m-2 day-1), FAO-56 eqs. 21-25"""
+    phi = np.radians(np.asarray(latitude, dtype=np.float64))[..., np.newaxis]
+    angle = 2 * np.pi * np.asarray(day_of_year) / 365
+    dr = 1 + 0.033 * np.cos(angle)
+    delta = 0.409 * np.sin(angle - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1.0, 1.0))
+    return (24 * 60 / np.pi) * SOLAR_CONSTANT * dr * (
+        ws * np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.sin(ws)
+    )
+
+
+def reference_et0(tmax, tmin, latitude, day_of_year):
+    """Reference evapotranspiration (mm/day) with the FAO-56 Hargreaves equation (eq. 52).
+
+    FAO-56 recommends Hargreaves when only air temperature is available, which
+    is what the historical endpoint returns (no radiation or humidity).
+    """
+    ra = extraterrestrial_radiation(latitude, day_of_year)
+    tmean = (tmax + tmin) / 2
+    spread = np.sqrt(np.maximum(tmax - tmin, 0.0))
+    return np.maximum(0.0023 * (tmean + 17.8) * spread * 0.408 * ra, 0.0)
+
+
+def rolling_sum(values, window):
+    """Trailing ``window``-day sum along the last axis (shorter at the start)"""
+    totals = np.cumsum(np.nan_to_num(values), axis=-1)
+    shifted = np.zeros_like(totals)
+    shifted[..., window:] = totals[..., :-window]
+    return totals - shifted
+
+
+def water_balance(precipitation, et0, window=WATER_BALANCE_WINDOW):
+    """Daily, rolling and cumulative climatic water balance (precipitation minus ET0, mm)"""
+    daily = np.nan_to_num(precipitation) - np.nan_to_num(et0)
+    return daily, rolling_sum(daily, window), np.cumsum(daily, axis=-1)
+
+
+def count_days(mask):
+    """Number of days where ``mask`` holds, per farm"""
+    return np.count_nonzero(mask, axis=-1)
+
+
+def compute_indicators(tmax, tmin, precipitation, latitude, day_of_year):
+    """All agronomic indicators for one or many farms.
+
+    ``tmax``, ``tmin`` and ``precipitation`` are (farms x days) or (days,) arrays,
+    ``latitude`` is a scalar or one value per farm and ``day_of_year`` has one
+    entry per day.
+    """
+    tmax = _as_array(tmax)
+    tmin = _as_array(tmin)
+    precipitation = _as_array(precipitation)
+    gdd = growing_degree_days(tmax, tmin)
+    et0 = reference_et0(tmax, tmin, latitude, day_of_year)
+    daily_balance, rolling_balance, cumulative_balance = water_balance(precipitation, et0)
+    return {
+        "gdd": gdd,
+        "gdd_cumulative": np.cumsum(np.nan_to_num(gdd), axis=-1),
+        "et0": et0,
+        "water_balance": daily_balance,
+        "water_balance_rolling": rolling_balance,
+        "water_balance_cumulative": cumulative_balance,
+        "frost_days": count_days(tmin <= FROST_THRESHOLD_C),
+        "heat_stress_days": count_days(tmax >= HEAT_STRESS_THRESHOLD_C),
+    }
+
+
+def indicators_from_history(hist_data):
+    """Compute indicators from a ``get_historical_weather`` response"""
+    daily = hist_data["daily"]
+    dates = np.array(daily["time"], dtype="datetime64[D]")
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(int) + 1
+    return compute_indicators(
+        daily["temperature_2m_max"],
+        daily["temperature_2m_min"],
+        daily["precipitation_sum"],
+        hist_data.get("latitude", 0.0),
+        day_of_year,
+    )
+
+
+def indicators_from_histories(histories):
+    """Compute indicators for many farms at once from equally long histories"""
+    first = histories[0]["daily"]
+    dates = np.array(first["time"], dtype="datetime64[D]")
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(int) + 1
+    stack = lambda key: np.array([h["daily"][key] for h in histories], dtype=np.float64)
+    return compute_indicators(
+        stack("temperature_2m_max"),
+        stack("temperature_2m_min"),
+        stack("precipitation_sum"),
+        np.array([h.get("latitude", 0.0) for h in histories], dtype=np.float64),
+        day_of_year,
+    )
+
+
+def indicators_context(indicators, location, days):
+    """One-paragraph summary of the indicators for the LLM prompt"""
+    return (
+        f"Agronomic conditions in {location} over the last {days} days: "
+        f"{indicators['gdd_cumulative'][-1]:.0f} growing degree days (base {GDD_BASE_C:.0f} °C), "
+        f"reference ET0 {np.nansum(indicators['et0']):.0f} mm, "
+        f"water balance {indicators['water_balance_cumulative'][-1]:+.0f} mm "
+        f"(last {WATER_BALANCE_WINDOW} days {indicators['water_balance_rolling'][-1]:+.0f} mm), "
+        f"{int(indicators['frost_days'])} frost days and "
+        f"{int(indicators['heat_stress_days'])} heat-stress days (Tmax ≥ {HEAT_STRESS_THRESHOLD_C:.0f} °C)."
+    )
@@ -1,24 +1,13 @@
 import streamlit as st
-from groq import Groq
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-import pycountry
-from fpdf import FPDF
-import io
-import base64
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut
-import plotly.express as px
-import plotly.graph_objects as go
-import unicodedata
 from config import GROQ_API_KEY, AIRVISUAL_API_KEY, DEFAULT_MODEL
 import os
 from dotenv import load_dotenv
 
-from utils.weather_utils import get_weather, get_historical_weather, get_air_quality
-from utils.pdf_utils import generate_pdf
-from utils.constants import SYSTEM_PROMPTS, EXAMPLE_QUERIES, CSS_STYLE
+from utils.constants import SYSTEM_PROMPTS, EXAMPLE_QUERIES, CSS_STYLE, SUMMARY_PROMPT
+
+# Heavy dependencies (groq, pandas, plotly, pycountry, fpdf, requests) are
+# imported inside the page that needs them. Python keeps modules in
+# sys.modules, so each one is loaded on a page's first use and then reused.
 
 # Load environment variables
 load_dotenv()
@@ -28,8 +17,43 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 AIRVISUAL_API_KEY = os.getenv("AIRVISUAL_API_KEY")
 DEFAULT_MODEL = "llama3-70b-8192"
 
-# === INIT Groq CLIENT ===
-client = Groq(api_key=GROQ_API_KEY)
+# === CONVERSATION MEMORY ===
+def summarize_turns(previous_summary, turns):
+    """Fold chat turns that left the verbatim window into the rolling summary"""
+    from common.llm_gateway import BACKGROUND, complete
+    transcript = "\n\n".join(f"User: {chat['user']}\nAI: {chat['ai']}" for chat in turns)
+    return complete(
+        [
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ],
+        model=DEFAULT_MODEL,
+        api_key=GROQ_API_KEY,
+        priority=BACKGROUND,
+        temperature=0.2
+    )
+
+# === CACHED CSV ANALYSIS ===
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_csv_summary(digest, _uploaded_file):
+    """Analyze an uploaded CSV once per file content; reruns reuse the cached summary"""
+    from csv_utils import analyze_csv
+    return analyze_csv(_uploaded_file)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_profile_context(digest, _summary):
+    """Serialize the dataset profile once per file for the AI Insights prompt"""
+    from profile_utils import build_profile, serialize_profile
+    return serialize_profile(build_profile(_summary))
+
+def get_file_digest(uploaded_file):
+    """Hash each upload once per session instead of on every rerun"""
+    digests = st.session_state.setdefault("csv_digests", {})
+    key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    if key not in digests:
+        from csv_utils import file_hash
+        digests[key] = file_hash(uploaded_file)
+    return digests[key]
 
 # === PAGE CONFIG ===
 st.set_page_config(
@@ -47,19 +71,11 @@ st.markdown("<h1 class='title'>🌾 AI Climate & Smart Farming Assistant</h1>",
 st.markdown("<p class='subtitle'>Real-time AI insights + live weather data</p>", unsafe_allow_html=True)
 st.markdown("---")
 
-# === SIDEBAR ===
-st.sidebar.header("🌟 Features")
-page = st.sidebar.radio(
-    "Choose your tool:",
-    [
-        "AI Assistant Chat",
-        "Weather Data",
-        "Smart Farming CSV Analysis",
-    ]
-)
-
 # === MULTI-TURN CHAT ===
-if page == "AI Assistant Chat":
+def render_chat_page():
+    from memory_utils import ConversationMemory
+    from llm_utils import stream_chat, format_timing
+
     st.subheader("🧠 AI Climate & Farming Chat Assistant")
     option = st.selectbox(
         "Choose a use case:",
@@ -71,31 +87,43 @@ if page == "AI Assistant Chat":
 
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    if "chat_memory" not in st.session_state:
+        st.session_state.chat_memory = ConversationMemory(summarize_turns)
 
     if st.button("Send to AI") and user_input.strip():
         with st.spinner("Thinking..."):
-            messages = [
-                {"role": "system", "content": SYSTEM_PROMPTS[option]},
-            ]
-            # Append chat history for multi-turn
-            for chat in st.session_state.chat_history:
-                messages.append({"role": "user", "content": chat["user"]})
-                messages.append({"role": "assistant", "content": chat["ai"]})
-            # Add current user input
-            messages.append({"role": "user", "content": user_input})
-
-            response = client.chat.completions.create(
-                model=DEFAULT_MODEL,
-                messages=messages,
+            # Recent turns go verbatim; older ones are carried by the rolling summary
+            system_prompt = SYSTEM_PROMPTS[option]
+            if st.session_state.get("agro_context"):
+                system_prompt += f"\n\n{st.session_state.agro_context}"
+            messages = st.session_state.chat_memory.build_messages(
+                system_prompt,
+                st.session_state.chat_history,
+                user_input
             )
-            ai_response = response.choices[0].message.content
 
-            # Save chat
+        st.markdown(f"<div class='user-input'>You:</div><div>{user_input}</div>", unsafe_allow_html=True)
+        timing = {}
+        try:
+            ai_response = st.write_stream(stream_chat(
+                timing,
+                api_key=GROQ_API_KEY,
+                model=DEFAULT_MODEL,
+                messages=messages,
+            ))
+        except Exception as e:
+            st.error(f"❌ AI request failed: {str(e)}")
+        else:
+            # Save chat only once the full answer has arrived
             st.session_state.chat_history.append({"user": user_input, "ai": ai_response})
+            st.session_state.last_chat_timing = timing
 
             # Clear input box
             st.rerun()
 
+    if st.session_state.get("last_chat_timing"):
+        st.caption(format_timing(st.session_state.last_chat_timing))
+
     if st.session_state.chat_history:
         st.markdown("### 🕘 Conversation History")
         for chat in reversed(st.session_state.chat_history):
@@ -104,6 +132,7 @@ if page == "AI Assistant Chat":
 
         # Add PDF download button
         if st.button("Download Chat as PDF"):
+            from utils.pdf_utils import generate_pdf
             pdf_bytes = generate_pdf(st.session_state.chat_history)
             st.download_button(
                 label="Click to Download PDF",
@@ -114,10 +143,17 @@ if page == "AI Assistant Chat":
 
     if st.button("Clear Chat History"):
         st.session_state.chat_history = []
+        st.session_state.chat_memory.reset()
         st.rerun()
 
 # === WEATHER DATA PAGE ===
-elif page == "Weather Data":
+def render_weather_page():
+    import pandas as pd
+    import plotly.graph_objects as go
+    from utils.weather_utils import get_weather, get_historical_weather, get_air_quality, get_provider_metrics
+    from agro_utils import indicators_from_history, indicators_context, WATER_BALANCE_WINDOW
+    from location_index import get_location_index
+
     st.subheader("🌍 Advanced Weather & Environmental Data")
 
     location_method = st.radio(
@@ -125,11 +161,18 @@ elif page == "Weather Data":
         ["Enter City", "Select Country"]
     )
 
+    index = get_location_index()
     location = None
     if location_method == "Enter City":
-        location = st.text_input("Enter a city or location (e.g., Los Angeles, Delhi):")
+        query = st.text_input("Enter a city or location (e.g., Los Angeles, Delhi):")
+        location = query
+        if query and index.resolve(query) is None:
+            # Offer known places for partial or misspelled names before hitting the geocoder
+            suggestions = [entry["label"] for entry in index.suggest(query) if entry["kind"] == "city"]
+            if suggestions:
+                location = st.selectbox("Did you mean:", [query] + suggestions)
     elif location_method == "Select Country":
-        country = st.selectbox("Select a country:", [country.name for country in pycountry.countries])
+        country = st.selectbox("Select a country:", index.countries())
         city = st.text_input("Enter city name:")
         location = f"{city}, {country}" if city else None
 
@@ -230,6 +273,51 @@ elif page == "Weather Data":
                         )
                         st.plotly_chart(fig2)
 
+                        # Derived agronomic indicators
+                        indicators = indicators_from_history(hist_data)
+                        st.markdown("### 🌾 Agronomic Indicators")
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Growing Degree Days", f"{indicators['gdd_cumulative'][-1]:.0f}")
+                        col2.metric("Water Balance", f"{indicators['water_balance_cumulative'][-1]:+.0f} mm")
+                        col3.metric("Frost Days", int(indicators['frost_days']))
+                        col4.metric("Heat-Stress Days", int(indicators['heat_stress_days']))
+
+                        fig3 = go.Figure()
+                        fig3.add_trace(go.Bar(
+                            x=df['Date'],
+                            y=indicators['et0'],
+                            name='Reference ET0 (mm)',
+                            marker_color='sandybrown'
+                        ))
+                        fig3.add_trace(go.Scatter(
+                            x=df['Date'],
+                            y=indicators['water_balance_rolling'],
+                            name=f'{WATER_BALANCE_WINDOW}-day Water Balance (mm)',
+                            line=dict(color='teal')
+                        ))
+                        fig3.add_trace(go.Scatter(
+                            x=df['Date'],
+                            y=indicators['gdd_cumulative'],
+                            name='Cumulative GDD',
+                            line=dict(color='green'),
+                            yaxis='y2'
+                        ))
+                        fig3.update_layout(
+                            title='Evapotranspiration, Water Balance and Growing Degree Days',
+                            xaxis_title='Date',
+                            yaxis_title='mm',
+                            yaxis2=dict(
+                                title='Growing Degree Days',
+                                overlaying='y',
+                                side='right'
+                            )
+                        )
+                        st.plotly_chart(fig3)
+
+                        # Shared with the chat page as context for the LLM
+                        st.session_state.agro_context = indicators_context(indicators, location, days)
+                        st.caption("These indicators are now included as context in the AI Assistant Chat.")
+
         with tab3:
             if st.button("Get Air Quality Data"):
                 with st.spinner("Fetching air quality data..."):
@@ -275,29 +363,41 @@ elif page == "Weather Data":
                             if 'sulphur_dioxide' in current and current['sulphur_dioxide'] is not None:
                                 st.write(f"- Sulphur Dioxide: {current['sulphur_dioxide']} μg/m³")
 
+                with st.expander("Provider performance"):
+                    for name, stats in get_provider_metrics().items():
+                        st.write(f"- {name}: {stats['calls']} calls, "
+                                 f"{stats['success_rate']:.0%} success, "
+                                 f"{stats['avg_latency'] * 1000:.0f} ms average")
+
 # === SMART FARMING CSV ANALYSIS PAGE ===
-elif page == "Smart Farming CSV Analysis":
+def render_csv_page():
+    import plotly.express as px
+    from plot_utils import scatter_with_trendline, POINT_BUDGET
+    from profile_utils import preview_text
+    from llm_utils import stream_chat, format_timing
+
     st.subheader("🌱 AI-Powered Farming Data Analysis")
     uploaded_file = st.file_uploader("Upload your farming dataset (CSV)", type=["csv"])
 
     if uploaded_file:
         try:
-            df = pd.read_csv(uploaded_file)
-            st.success("✅ Data loaded successfully!")
+            with st.spinner("Scanning dataset..."):
+                summary = load_csv_summary(get_file_digest(uploaded_file), uploaded_file)
+            st.success(f"✅ Data loaded successfully! ({summary['rows']:,} rows)")
 
             # Create tabs for different analyses
             tab1, tab2 = st.tabs(["Data Explorer", "AI Insights"])
 
             with tab1:
                 st.markdown("### Dataset Preview")
-                st.dataframe(df.head(5))
+                st.dataframe(summary["preview"])
 
                 if st.checkbox("Show Summary Statistics"):
                     st.markdown("### Summary Statistics")
-                    st.write(df.describe().transpose())
+                    st.write(summary["describe"])
 
                 # Interactive visualizations
-                numeric_cols = df.select_dtypes(include=["float64", "int64"]).columns.tolist()
+                numeric_cols = summary["numeric_cols"]
                 if numeric_cols:
                     col1, col2 = st.columns(2)
                     with col1:
@@ -305,21 +405,24 @@ elif page == "Smart Farming CSV Analysis":
                     with col2:
                         y_axis = st.selectbox("Y-Axis", numeric_cols)
 
-                    if x_axis and y_axis:
-                        fig = px.scatter(
-                            df,
-                            x=x_axis,
-                            y=y_axis,
-                            title=f"{y_axis} vs {x_axis}",
-                            trendline="ols",
-                            color_discrete_sequence=["#2E7D32"]
+                    plot_mode = "Points"
+                    if summary["rows"] > POINT_BUDGET:
+                        plot_mode = st.radio(
+                            "Large dataset view:",
+                            ["Points", "Density"],
+                            horizontal=True,
+                            help=f"Points shows a stratified sample of {POINT_BUDGET:,} rows; "
+                                 "the trendline is always fit on every row."
                         )
+
+                    if x_axis and y_axis:
+                        fig = scatter_with_trendline(summary, x_axis, y_axis, mode=plot_mode)
                         st.plotly_chart(fig)
 
                     # Correlation heatmap
                     if len(numeric_cols) > 1:
                         st.markdown("### Correlation Matrix")
-                        corr = df[numeric_cols].corr()
+                        corr = summary["corr"]
                         fig = px.imshow(corr,
                                         text_auto=True,
                                         aspect="auto",
@@ -340,43 +443,58 @@ elif page == "Smart Farming CSV Analysis":
                            "'Recommend irrigation improvements', 'Predict harvest timing'")
 
                 if st.button("Generate AI Insights", type="primary"):
-                    with st.spinner("🧠 Analyzing with AI..."):
+                    with st.spinner("🧠 Preparing dataset profile..."):
                         # Prepare data context
-                        context = f"Dataset has {len(df)} rows and columns: {', '.join(df.columns)}\n"
-                        context += f"First 3 rows:\n{df.head(3).to_string(index=False)}"
-
-                        # Get AI analysis
-                        messages = [
-                            {
-                                "role": "system",
-                                "content": (
-                                    "You are an expert agricultural data scientist. Analyze farming datasets and provide: "
-                                    "1. Actionable insights for improving crop yield "
-                                    "2. Recommendations based on climate patterns "
-                                    "3. Resource optimization strategies "
-                                    "4. Sustainable farming practices "
-                                    "Use bullet points and specific numbers when possible."
-                                )
-                            },
-                            {
-                                "role": "user",
-                                "content": f"{analysis_prompt}\n\n{context}"
-                            }
-                        ]
-
-                        response = client.chat.completions.create(
+                        context = load_profile_context(get_file_digest(uploaded_file), summary)
+                        context += f"\nFirst 3 rows:\n{preview_text(summary['preview'])}"
+
+                    # Get AI analysis
+                    messages = [
+                        {
+                            "role": "system",
+                            "content": (
+                                "You are an expert agricultural data scientist. Analyze farming datasets and provide: "
+                                "1. Actionable insights for improving crop yield "
+                                "2. Recommendations based on climate patterns "
+                                "3. Resource optimization strategies "
+                                "4. Sustainable farming practices "
+                                "Use bullet points and specific numbers when possible."
+                            )
+                        },
+                        {
+                            "role": "user",
+                            "content": f"{analysis_prompt}\n\n{context}"
+                        }
+                    ]
+
+                    timing = {}
+                    with st.container(border=True):
+                        st.write_stream(stream_chat(
+                            timing,
+                            api_key=GROQ_API_KEY,
                             model=DEFAULT_MODEL,
                             messages=messages,
                             temperature=0.3
-                        )
-                        insights = response.choices[0].message.content
-                        st.markdown(f"<div class='insight-box'>{insights}</div>", unsafe_allow_html=True)
+                        ))
+                    st.caption(format_timing(timing))
 
         except Exception as e:
             st.error(f"❌ Error processing data: {str(e)}")
     else:
         st.info("👆 Upload a CSV file containing your farming data to get started")
 
+# === PAGE REGISTRY ===
+PAGES = {
+    "AI Assistant Chat": render_chat_page,
+    "Weather Data": render_weather_page,
+    "Smart Farming CSV Analysis": render_csv_page,
+}
+
+# === SIDEBAR ===
+st.sidebar.header("🌟 Features")
+page = st.sidebar.radio("Choose your tool:", list(PAGES))
+PAGES[page]()
+
 # === FOOTER ===
 st.markdown("---")
 st.markdown(
@@ -0,0 +1,131 @@
+"""Micro-benchmarks for the Farming Assistant helpers.
+
+Run with ``python benchmarks.py <name>``; each benchmark prints its timings.
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+_IMPORT_PROBE = """
+import importlib, sys, time
+mods = sys.argv[1:]
+start = time.perf_counter()
+for name in mods:
+    importlib.import_module(name)
+cold = time.perf_counter() - start
+start = time.perf_counter()
+for name in mods:
+    importlib.import_module(name)
+print(cold, time.perf_counter() - start)
+"""
+
+
+def _imports(nodes):
+    """Module names imported anywhere inside the given AST nodes"""
+    found = []
+    for node in (n for root in nodes for n in ast.walk(root)):
+        if isinstance(node, ast.Import):
+            found += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            found.append(node.module)
+    return found
+
+
+def page_imports(path=APP_PATH):
+    """Modules each page of app.py loads, read from its PAGES registry.
+
+    A page pays for the module-level imports plus the imports inside its
+    render function and every module-level helper it uses, so the list
+    follows the app without being maintained by hand.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    registry = next(node.value for node in tree.body if isinstance(node, ast.Assign)
+                    and any(getattr(target, "id", None) == "PAGES" for target in node.targets))
+    top_level = _imports(node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+    def reachable(name, seen):
+        seen.add(name)
+        # Helpers count whether they are called or passed on as callbacks
+        for node in ast.walk(functions[name]):
+            if isinstance(node, ast.Name) and node.id in functions and node.id not in seen:
+                reachable(node.id, seen)
+        return seen
+
+    pages = {}
+    for key, value in zip(registry.keys, registry.values):
+        modules = top_level + _imports(functions[name] for name in reachable(value.id, set()))
+        pages[ast.literal_eval(key)] = list(dict.fromkeys(modules))
+    # What every page paid before imports were made page-scoped
+    pages["Eager (all pages)"] = list(dict.fromkeys(m for modules in list(pages.values()) for m in modules))
+    return pages
+
+
+def _timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_pdf_export(turns=1000):
+    """Clean and render a long synthetic chat history to PDF"""
+    from pdf_utlis import clean_text_for_pdf, generate_pdf
+
+    answer = (
+        "• Irrigate at 25–30 °C when soil moisture ≤ 40 % → apply 12 mm/day.\n"
+        "• Expected yield ≈ 4.2 t/ha ± 0.3; PM2.5 around 35 µg/m³ is acceptable.\n"
+        "“Drip lines” reduce losses — see FAO-56 guidance… 🌱 "
+    ) * 4
+    history = [{"user": f"Question {i}: how much water does maize need at 32℃?", "ai": answer}
+               for i in range(turns)]
+
+    texts = [chat[key] for chat in history for key in ("user", "ai")]
+    clean_time, _ = _timed(lambda: [clean_text_for_pdf(text) for text in texts])
+    pdf_time, pdf_bytes = _timed(generate_pdf, history, repeat=1)
+    print(f"{turns} turns: clean {clean_time * 1000:.1f} ms, "
+          f"generate_pdf {pdf_time:.2f} s, {len(pdf_bytes) / 1e6:.1f} MB")
+
+
+def bench_startup(runs=5):
+    """Import cost per page: cold (fresh interpreter) vs warm (a Streamlit rerun)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for page, modules in page_imports().items():
+        cold, warm = [], []
+        for _ in range(runs):
+            result = subprocess.run(
+                [sys.executable, "-c", _IMPORT_PROBE, *modules], cwd=here, capture_output=True, text=True
+            )
+            if result.returncode:
+                break
+            output = result.stdout.split()
+            cold.append(float(output[0]))
+            warm.append(float(output[1]))
+        if result.returncode:
+            print(f"{page:28s} skipped: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{page:28s} cold {statistics.median(cold) * 1000:8.1f} ms   "
+              f"warm {statistics.median(warm) * 1e6:8.1f} µs")
+
+
+BENCHMARKS = {
+    "pdf": bench_pdf_export,
+    "startup": bench_startup,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+    BENCHMARKS[args.name]()
@@ -20,6 +20,13 @@ SYSTEM_PROMPTS = {
     ),
 }
 
+# Prompt used to fold older chat turns into the rolling conversation summary
+SUMMARY_PROMPT = (
+    "You maintain the memory of a farming and climate advice conversation. "
+    "Merge the existing summary with the new turns into one concise summary under 200 words. "
+    "Keep locations, crops, quantities, dates, constraints and advice already given; drop pleasantries."
+)
+
 # Example queries for each use case
 EXAMPLE_QUERIES = {
     "Track Pollution": "e.g., What's the air quality near Lahore right now?",
@@ -0,0 +1,257 @@
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+
+# Rows parsed per chunk; bounds peak memory regardless of file size
+CHUNK_SIZE = 100_000
+# Rows kept in the uniform reservoir sample used for quantiles and plots
+SAMPLE_SIZE = 50_000
+# Text columns with at most this share of distinct values are read as categories
+CATEGORY_RATIO = 0.5
+HASH_BLOCK_SIZE = 1 << 20
+# Categories reported per text column, and distinct values tracked while scanning
+TOP_K = 5
+MAX_TRACKED_CATEGORIES = 1_000
+
+
+def file_hash(file):
+    """Return a SHA-256 digest of an uploaded file, read block by block"""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def infer_dtypes(sample):
+    """Infer compact read dtypes from the first rows of a CSV"""
+    dtypes = {}
+    for col in sample.select_dtypes(include=["object", "string"]).columns:
+        if sample[col].nunique(dropna=True) <= CATEGORY_RATIO * len(sample):
+            dtypes[col] = "category"
+    return dtypes
+
+
+def downcast_frame(df):
+    """Shrink numeric columns to the smallest dtype that holds their values"""
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    for col in df.select_dtypes(include="float").columns:
+        df[col] = pd.to_numeric(df[col], downcast="float")
+    return df
+
+
+class StreamingStats:
+    """Accumulate describe() statistics and a pairwise correlation matrix chunk by chunk.
+
+    Per-pair sums are kept over rows where both columns are present, matching
+    pandas' pairwise-complete ``corr()``. Values are shifted by the first chunk's
+    means before summing to keep the one-pass formulas numerically stable.
+    """
+
+    def __init__(self, columns, sample_size=SAMPLE_SIZE, seed=0):
+        k = len(columns)
+        self.columns = list(columns)
+        self.rows = 0
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        self.sample_size = sample_size
+        self.sample = np.empty((0, k), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        """Fold a chunk of numeric values (rows x columns) into the running sums"""
+        values = chunk.to_numpy(dtype=np.float64, na_value=np.nan)
+        if not len(values):
+            return
+        present = ~np.isnan(values)
+        if self.shift is None:
+            counts = present.sum(axis=0)
+            sums = np.where(present, values, 0.0).sum(axis=0)
+            self.shift = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        shifted = np.where(present, values - self.shift, 0.0)
+        mask = present.astype(np.float64)
+        self.n += mask.T @ mask
+        self.sx += shifted.T @ mask
+        self.sxx += (shifted * shifted).T @ mask
+        self.sxy += shifted.T @ shifted
+
+        with np.errstate(invalid="ignore"):
+            self.min = np.fmin(self.min, np.nanmin(np.where(present, values, np.inf), axis=0))
+            self.max = np.fmax(self.max, np.nanmax(np.where(present, values, -np.inf), axis=0))
+
+        self._update_sample(values)
+        self.rows += len(values)
+
+    def _update_sample(self, values):
+        """Vectorized reservoir sampling (Algorithm R) over one chunk"""
+        fill = min(max(self.sample_size - len(self.sample), 0), len(values))
+        if fill:
+            self.sample = np.vstack([self.sample, values[:fill].astype(np.float32)])
+        rest = values[fill:]
+        if not len(rest):
+            return
+        seen = self.rows + fill + np.arange(len(rest))
+        slots = self._rng.integers(0, seen + 1)
+        keep = slots < self.sample_size
+        self.sample[slots[keep]] = rest[keep]
+
+    def describe(self):
+        """Return statistics shaped like ``df.describe().transpose()``"""
+        count = np.diag(self.n)
+        sx = np.diag(self.sx)
+        sxx = np.diag(self.sxx)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.shift + sx / count
+            var = (sxx - sx * sx / count) / (count - 1)
+        std = np.sqrt(np.clip(var, 0, None))
+        if len(self.sample):
+            with np.errstate(invalid="ignore"):
+                quartiles = np.nanpercentile(self.sample, [25, 50, 75], axis=0)
+        else:
+            quartiles = np.full((3, len(self.columns)), np.nan)
+        return pd.DataFrame({
+            "count": count,
+            "mean": mean,
+            "std": std,
+            "min": np.where(np.isfinite(self.min), self.min, np.nan),
+            "25%": quartiles[0],
+            "50%": quartiles[1],
+            "75%": quartiles[2],
+            "max": np.where(np.isfinite(self.max), self.max, np.nan),
+        }, index=self.columns)
+
+    def corr(self):
+        """Return the pairwise-complete Pearson correlation matrix"""
+        sy = self.sx.T
+        syy = self.sxx.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = self.n * self.sxy - self.sx * sy
+            var_x = self.n * self.sxx - self.sx * self.sx
+            var_y = self.n * syy - sy * sy
+            corr = cov / np.sqrt(var_x * var_y)
+        corr[self.n < 2] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.columns, columns=self.columns)
+
+    def pair_sums(self):
+        """Return the raw pairwise sums so regressions can be fit without re-reading"""
+        shift = self.shift if self.shift is not None else np.zeros(len(self.columns))
+        return {"n": self.n, "sx": self.sx, "sxx": self.sxx, "sxy": self.sxy, "shift": shift}
+
+
+class ColumnProfile:
+    """Accumulate missing counts, top categories and monthly means chunk by chunk"""
+
+    def __init__(self, columns, numeric_cols, date_col=None):
+        self.missing = pd.Series(0, index=list(columns), dtype="int64")
+        self.numeric_cols = list(numeric_cols)
+        self.category_cols = [c for c in columns if c not in self.numeric_cols and c != date_col]
+        self.categories = {col: pd.Series(dtype="int64") for col in self.category_cols}
+        self.date_col = date_col
+        self.month_sums = None
+        self.month_counts = None
+
+    def update(self, chunk, numeric):
+        self.missing = self.missing.add(chunk.isna().sum(), fill_value=0).astype("int64")
+        for col in self.category_cols:
+            counts = self.categories[col].add(chunk[col].value_counts(), fill_value=0)
+            if len(counts) > MAX_TRACKED_CATEGORIES:
+                # Keep heavy hitters only so high-cardinality columns stay bounded
+                counts = counts.nlargest(MAX_TRACKED_CATEGORIES)
+            self.categories[col] = counts
+        if self.date_col is not None and self.numeric_cols:
+            months = _parse_dates(chunk[self.date_col]).dt.month
+            grouped = numeric.groupby(months)
+            sums, counts = grouped.sum(), grouped.count()
+            if self.month_sums is None:
+                self.month_sums, self.month_counts = sums, counts
+            else:
+                self.month_sums = self.month_sums.add(sums, fill_value=0)
+                self.month_counts = self.month_counts.add(counts, fill_value=0)
+
+    def top_categories(self, k=TOP_K):
+        return {
+            col: [(str(value), int(count)) for value, count in counts.nlargest(k).items()]
+            for col, counts in self.categories.items()
+        }
+
+    def monthly_means(self):
+        if self.month_sums is None:
+            return None
+        means = self.month_sums / self.month_counts.where(self.month_counts > 0)
+        means.index = means.index.astype(int)
+        return means.sort_index()
+
+
+def _parse_dates(values):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return pd.to_datetime(values, errors="coerce")
+
+
+def detect_date_column(head):
+    """Return the first text column that mostly parses as dates, if any"""
+    for col in head.columns:
+        if pd.api.types.is_numeric_dtype(head[col]) or pd.api.types.is_bool_dtype(head[col]):
+            continue
+        parsed = _parse_dates(head[col].dropna())
+        if len(parsed) and parsed.notna().mean() >= 0.9:
+            return col
+    return None
+
+
+def _read_chunks(file, dtypes):
+    file.seek(0)
+    return pd.read_csv(file, chunksize=CHUNK_SIZE, dtype=dtypes or None)
+
+
+def _scan(file, head, dtypes, numeric_cols, date_col, sample_size):
+    stats = StreamingStats(numeric_cols, sample_size=sample_size)
+    profile = ColumnProfile(head.columns, numeric_cols, date_col)
+    for chunk in _read_chunks(file, dtypes):
+        numeric = chunk[numeric_cols].apply(pd.to_numeric, errors="coerce")
+        stats.update(numeric)
+        profile.update(chunk, numeric)
+    return stats, profile
+
+
+def analyze_csv(file, sample_size=SAMPLE_SIZE):
+    """Stream a CSV once and summarize it without holding the full table in memory"""
+    file.seek(0)
+    head = pd.read_csv(file, nrows=min(CHUNK_SIZE, 10_000))
+    numeric_cols = head.select_dtypes(include="number").columns.tolist()
+    date_col = detect_date_column(head)
+    dtypes = infer_dtypes(head.drop(columns=[date_col]) if date_col else head)
+
+    try:
+        stats, profile = _scan(file, head, dtypes, numeric_cols, date_col, sample_size)
+    except (ValueError, TypeError):
+        # A pinned dtype did not hold for a later chunk; retry with plain inference
+        dtypes = {}
+        stats, profile = _scan(file, head, dtypes, numeric_cols, date_col, sample_size)
+    file.seek(0)
+
+    sample = downcast_frame(pd.DataFrame(stats.sample, columns=numeric_cols))
+    return {
+        "rows": stats.rows,
+        "columns": head.columns.tolist(),
+        "dtypes": {col: str(dtypes.get(col, head[col].dtype)) for col in head.columns},
+        "preview": head.head(5),
+        "numeric_cols": numeric_cols,
+        "describe": stats.describe(),
+        "corr": stats.corr(),
+        "pair_sums": stats.pair_sums(),
+        "sample": sample,
+        "missing": (profile.missing / max(stats.rows, 1)).to_dict(),
+        "top_categories": profile.top_categories(),
+        "date_column": date_col,
+        "monthly_means": profile.monthly_means(),
+    }
@@ -0,0 +1,27 @@
+import time
+from common.llm_gateway import stream
+
+
+def stream_chat(timing=None, **params):
+    """Yield text deltas from a streamed chat completion via the shared gateway.
+
+    If ``timing`` is a dict it receives ``ttft`` (seconds to the first token)
+    and, once the stream is exhausted, ``total`` (seconds for the whole answer).
+    """
+    start = time.perf_counter()
+    for delta in stream(**params):
+        if timing is not None and "ttft" not in timing:
+            timing["ttft"] = time.perf_counter() - start
+        yield delta
+    if timing is not None:
+        timing["total"] = time.perf_counter() - start
+
+
+def format_timing(timing):
+    """Short caption for stream latency metrics"""
+    if "ttft" not in timing:
+        return ""
+    caption = f"⚡ First token in {timing['ttft']:.2f}s"
+    if "total" in timing:
+        caption += f" • full answer in {timing['total']:.2f}s"
+    return caption
@@ -0,0 +1,135 @@
+import csv
+import os
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+CITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.csv")
+MAX_SUGGESTIONS = 8
+# Minimum Dice similarity between trigram sets for a fuzzy match
+FUZZY_THRESHOLD = 0.35
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children = {}
+        # First MAX_SUGGESTIONS entries under this prefix, so lookups never walk the subtree
+        self.ids = []
+
+
+class LocationIndex:
+    """Offline prefix trie plus trigram index over countries and bundled cities"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.root = _TrieNode()
+        self.grams = {}
+        self.gram_counts = []
+        self.by_name = {}
+        for entry_id, entry in enumerate(entries):
+            key = normalize(entry["name"])
+            self.by_name.setdefault(key, []).append(entry_id)
+            words = key.split(" ")
+            # Index every word start so "angeles" also finds "Los Angeles"
+            for i in range(len(words)):
+                self._insert(" ".join(words[i:]), entry_id)
+            grams = trigrams(key)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.grams.setdefault(gram, []).append(entry_id)
+
+    def _insert(self, key, entry_id):
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.ids) < MAX_SUGGESTIONS and entry_id not in node.ids:
+                node.ids.append(entry_id)
+
+    def autocomplete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Entries whose name (or a word in it) starts with ``prefix``"""
+        node = self.root
+        for char in normalize(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self.entries[i] for i in node.ids[:limit]]
+
+    def fuzzy(self, query, limit=MAX_SUGGESTIONS, threshold=FUZZY_THRESHOLD):
+        """Entries whose name is trigram-similar to ``query``, best first"""
+        query_grams = trigrams(normalize(query))
+        if not query_grams:
+            return []
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        scored = []
+        for entry_id, common in shared.items():
+            score = 2 * common / (len(query_grams) + self.gram_counts[entry_id])
+            if score >= threshold:
+                scored.append((score, entry_id))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self.entries[i] for _, i in scored[:limit]]
+
+    def suggest(self, query, limit=MAX_SUGGESTIONS):
+        """Prefix matches first, topped up with fuzzy matches for typos"""
+        results = self.autocomplete(query, limit)
+        if len(results) < limit:
+            seen = {id(entry) for entry in results}
+            results += [e for e in self.fuzzy(query, limit) if id(e) not in seen][:limit - len(results)]
+        return results
+
+    def resolve(self, location):
+        """Return the single known city for "City" or "City, Country", else None"""
+        city, _, country = location.partition(",")
+        candidates = [
+            self.entries[i] for i in self.by_name.get(normalize(city), ())
+            if self.entries[i]["kind"] == "city"
+        ]
+        if country.strip():
+            candidates = [e for e in candidates if normalize(e["country"]) == normalize(country)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def countries(self):
+        return sorted(e["name"] for e in self.entries if e["kind"] == "country")
+
+
+def load_cities(path=CITIES_FILE):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {
+                "name": row["name"],
+                "country": row["country"],
+                "kind": "city",
+                "label": f"{row['name']}, {row['country']}",
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_location_index():
+    """Build the index once per process"""
+    import pycountry
+    countries = [
+        {"name": c.name, "country": c.name, "kind": "country", "label": c.name,
+         "latitude": None, "longitude": None}
+        for c in pycountry.countries
+    ]
+    # Cities first so they win the limited suggestion slots at each trie node
+    return LocationIndex(load_cities() + countries)
@@ -0,0 +1,80 @@
+from token_utils import count_tokens, truncate_tokens
+
+# Tokens available for system prompt, summary, recent turns and the new question
+HISTORY_TOKEN_BUDGET = 3_000
+# Tokens reserved for the rolling summary of older turns
+SUMMARY_TOKEN_BUDGET = 400
+# Most recent turns always sent verbatim, even if they exceed the budget
+MIN_RECENT_TURNS = 1
+# When compacting, shrink the verbatim window to this share of its budget so
+# the summary is extended every few turns rather than on every message
+COMPACTION_RATIO = 0.6
+
+
+def turn_tokens(turn):
+    return count_tokens(turn["user"]) + count_tokens(turn["ai"]) + 8
+
+
+class ConversationMemory:
+    """Keep recent chat turns verbatim and fold older ones into a rolling summary.
+
+    ``summarize(previous_summary, turns)`` is called only when turns overflow the
+    verbatim window, and only with the turns being evicted. The summary is then
+    reused as-is until the window overflows again.
+
+    The summary is held to ``summary_budget`` tokens: an overlong one is sent
+    back once to be condensed on its own, and cut at a word boundary if it is
+    still too long.
+    """
+
+    def __init__(self, summarize, token_budget=HISTORY_TOKEN_BUDGET,
+                 summary_budget=SUMMARY_TOKEN_BUDGET, min_recent_turns=MIN_RECENT_TURNS):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.min_recent_turns = min_recent_turns
+        self.summary = ""
+        self.summarized_turns = 0
+
+    def reset(self):
+        self.summary = ""
+        self.summarized_turns = 0
+
+    def _fit_summary(self, summary):
+        if count_tokens(summary) > self.summary_budget:
+            summary = self.summarize(summary, [])
+        return truncate_tokens(summary, self.summary_budget)
+
+    def _window_start(self, history, available):
+        """Index of the oldest turn that still fits in ``available`` tokens"""
+        start = len(history)
+        used = 0
+        for index in range(len(history) - 1, -1, -1):
+            used += turn_tokens(history[index])
+            if used > available and len(history) - index > self.min_recent_turns:
+                break
+            start = index
+        return start
+
+    def build_messages(self, system_prompt, history, user_input):
+        """Return chat messages for ``user_input`` that fit within the token budget"""
+        if self.summarized_turns > len(history):
+            # History was cleared or replaced; the summary no longer applies
+            self.reset()
+
+        fixed = count_tokens(system_prompt) + count_tokens(user_input) + self.summary_budget
+        available = self.token_budget - fixed
+        start = max(self._window_start(history, available), self.summarized_turns)
+        if start > self.summarized_turns:
+            start = max(self._window_start(history, int(available * COMPACTION_RATIO)), start)
+            self.summary = self._fit_summary(self.summarize(self.summary, history[self.summarized_turns:start]))
+            self.summarized_turns = start
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for chat in history[start:]:
+            messages.append({"role": "user", "content": chat["user"]})
+            messages.append({"role": "assistant", "content": chat["ai"]})
+        messages.append({"role": "user", "content": user_input})
+        return messages
@@ -1,56 +1,131 @@
 from fpdf import FPDF
+import io
+from functools import lru_cache
+import re
 import unicodedata
 
+# Characters the built-in PDF fonts cannot show, mapped to readable ASCII
+PDF_REPLACEMENTS = {
+    'μ': 'micro',
+    'µ': 'micro',
+    '°': ' degrees',
+    '℃': ' degrees C',
+    '±': '+/-',
+    '×': 'x',
+    '÷': '/',
+    '≤': '<=',
+    '≥': '>=',
+    '≠': '!=',
+    '∞': 'infinity',
+    '→': '->',
+    '←': '<-',
+    '↑': 'up',
+    '↓': 'down',
+    '↔': '<->',
+    '≈': '~=',
+    '∑': 'sum',
+    '∏': 'product',
+    '√': 'sqrt',
+    '∫': 'integral',
+    '∆': 'delta',
+    '∇': 'nabla',
+    '∂': 'partial',
+    '∝': 'proportional to',
+    '∅': 'empty set',
+    '∈': 'in',
+    '∉': 'not in',
+    '⊂': 'subset',
+    '⊃': 'superset',
+    '∪': 'union',
+    '∩': 'intersection',
+    '∀': 'for all',
+    '∃': 'exists',
+    '∄': 'does not exist',
+    '∴': 'therefore',
+    '∵': 'because',
+    '‘': "'",
+    '’': "'",
+    '“': '"',
+    '”': '"',
+    '–': '-',
+    '—': '--',
+    '…': '...',
+    '•': '*',
+}
+PDF_TABLE = str.maketrans(PDF_REPLACEMENTS)
+NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+NON_LATIN1 = re.compile(r"[^\x00-\xff]")
+LINE_HEIGHT = 10
+
+
+@lru_cache(maxsize=4096)
+def _fallback(char):
+    """Latin-1 approximation for a character missing from PDF_REPLACEMENTS"""
+    decomposed = unicodedata.normalize('NFKD', char).translate(PDF_TABLE)
+    kept = ''.join(c for c in decomposed if ord(c) < 256 and not unicodedata.combining(c))
+    return kept or '?'
+
+
+@lru_cache(maxsize=4096)
+def _clean_run(run):
+    """Translate one run of non-ASCII characters; runs repeat a lot across messages"""
+    return NON_LATIN1.sub(lambda match: _fallback(match.group()), run.translate(PDF_TABLE))
+
+
 def clean_text_for_pdf(text):
     """Clean text to be PDF-safe by removing or replacing problematic characters"""
-    # Normalize Unicode characters
-    text = unicodedata.normalize('NFKD', text)
-    # Replace common problematic characters
-    replacements = {
-        'μ': 'micro',
-        '°': ' degrees',
-        '℃': 'C',
-        '±': '+/-',
-        '×': 'x',
-        '÷': '/',
-        '≤': '<=',
-        '≥': '>=',
-        '≠': '!=',
-        '∞': 'infinity',
-        '→': '->',
-        '←': '<-',
-        '↑': 'up',
-        '↓': 'down',
-        '↔': '<->',
-        '≈': '~=',
-        '∑': 'sum',
-        '∏': 'product',
-        '√': 'sqrt',
-        '∫': 'integral',
-        '∆': 'delta',
-        '∇': 'nabla',
-        '∂': 'partial',
-        '∝': 'proportional to',
-        '∞': 'infinity',
-        '∅': 'empty set',
-        '∈': 'in',
-        '∉': 'not in',
-        '⊂': 'subset',
-        '⊃': 'superset',
-        '∪': 'union',
-        '∩': 'intersection',
-        '∀': 'for all',
-        '∃': 'exists',
-        '∄': 'does not exist',
-        '∴': 'therefore',
-        '∵': 'because'
-    }
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    return text
+    if text.isascii():
+        return text
+    # Only the non-ASCII runs need work, so translate those instead of the whole text
+    return NON_ASCII.sub(lambda match: _clean_run(match.group()), text)
 
-def generate_pdf(chat_history, title="AI Climate & Farming Advice"):
+
+def _wrap_lines(pdf, text, width, word_widths):
+    """Greedy word wrap for the current font; word widths are memoized across calls"""
+    space = pdf.get_string_width(' ')
+    for paragraph in text.split('\n'):
+        line, line_width = [], 0.0
+        for word in paragraph.split(' '):
+            w = word_widths.get(word)
+            if w is None:
+                w = word_widths[word] = pdf.get_string_width(word)
+            if w > width:
+                # Hard-break words longer than a full line
+                if line:
+                    yield ' '.join(line)
+                    line, line_width = [], 0.0
+                piece = ''
+                for char in word:
+                    if pdf.get_string_width(piece + char) > width:
+                        yield piece
+                        piece = ''
+                    piece += char
+                word, w = piece, pdf.get_string_width(piece)
+            needed = w if not line else line_width + space + w
+            if line and needed > width:
+                yield ' '.join(line)
+                line, line_width = [word], w
+            else:
+                line.append(word)
+                line_width = needed
+        yield ' '.join(line)
+
+
+def _write_block(pdf, label, text, word_widths, gap):
+    pdf.set_font("helvetica", "B", 12)
+    pdf.cell(0, LINE_HEIGHT, label, ln=True)
+    pdf.set_font("helvetica", "", 12)
+    width = pdf.w - pdf.l_margin - pdf.r_margin - 2 * pdf.c_margin
+    for line in _wrap_lines(pdf, text, width, word_widths):
+        # One cell per line lets FPDF break pages as the history is written
+        pdf.cell(0, LINE_HEIGHT, line, ln=True)
+    pdf.ln(gap)
+
+
+def write_pdf(chat_history, fp, title="AI Climate & Farming Advice"):
+    """Lay out the chat history message by message and write the PDF to ``fp``"""
     pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
     pdf.add_page()
 
     # Use built-in font
@@ -58,24 +133,15 @@ def generate_pdf(chat_history, title="AI Climate & Farming Advice"):
     pdf.cell(0, 10, clean_text_for_pdf(title), ln=True, align='C')
     pdf.ln(10)
 
-    # Chat history
+    word_widths = {}
     for chat in chat_history:
-        # User message
-        pdf.set_font("helvetica", "B", 12)
-        pdf.cell(0, 10, "User:", ln=True)
-        pdf.set_font("helvetica", "", 12)
-        # Clean and wrap text
-        user_text = clean_text_for_pdf(chat["user"])
-        pdf.multi_cell(0, 10, user_text)
-        pdf.ln(5)
-
-        # AI response
-        pdf.set_font("helvetica", "B", 12)
-        pdf.cell(0, 10, "AI Response:", ln=True)
-        pdf.set_font("helvetica", "", 12)
-        # Clean and wrap text
-        ai_text = clean_text_for_pdf(chat["ai"])
-        pdf.multi_cell(0, 10, ai_text)
-        pdf.ln(10)
-
-    return pdf.output(dest="S").encode("latin-1", "replace") 
+        _write_block(pdf, "User:", clean_text_for_pdf(chat["user"]), word_widths, 5)
+        _write_block(pdf, "AI Response:", clean_text_for_pdf(chat["ai"]), word_widths, 10)
+
+    fp.write(pdf.output(dest="S").encode("latin-1", "replace"))
+
+
+def generate_pdf(chat_history, title="AI Climate & Farming Advice"):
+    buffer = io.BytesIO()
+    write_pdf(chat_history, buffer, title)
+    return buffer.getvalue()
@@ -0,0 +1,98 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Maximum number of markers sent to the browser for a scatter plot
+POINT_BUDGET = 5_000
+# Number of x-quantile strata used when thinning a sample
+STRATA = 50
+
+
+def fit_ols_from_sums(pair_sums, i, j):
+    """Least squares line of column j on column i from streamed pairwise sums"""
+    n = pair_sums["n"][i, j]
+    if n < 2:
+        return None
+    sx = pair_sums["sx"][i, j]
+    sy = pair_sums["sx"][j, i]
+    sxx = pair_sums["sxx"][i, j]
+    syy = pair_sums["sxx"][j, i]
+    sxy = pair_sums["sxy"][i, j]
+    var_x = n * sxx - sx * sx
+    if var_x <= 0:
+        return None
+    cov = n * sxy - sx * sy
+    var_y = n * syy - sy * sy
+    slope = cov / var_x
+    shift = pair_sums["shift"]
+    intercept = shift[j] + (sy - slope * sx) / n - slope * shift[i]
+    r2 = cov * cov / (var_x * var_y) if var_y > 0 else 1.0
+    return slope, intercept, r2
+
+
+def stratified_sample(df, x, budget=POINT_BUDGET, strata=STRATA, seed=0):
+    """Thin a frame to ``budget`` rows, sampling proportionally from x-quantile strata
+    so sparse tails of the distribution stay visible"""
+    if len(df) <= budget:
+        return df
+    values = df[x].to_numpy(dtype=np.float64)
+    edges = np.unique(np.nanquantile(values, np.linspace(0, 1, strata + 1)))
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, max(len(edges) - 2, 0))
+    bins[np.isnan(values)] = -1
+
+    rng = np.random.default_rng(seed)
+    rank = rng.random(len(df))
+    order = np.lexsort((rank, bins))
+    sorted_bins = bins[order]
+    starts = np.searchsorted(sorted_bins, sorted_bins, side="left")
+    position = np.arange(len(df)) - starts
+    counts = np.bincount(bins + 1)
+    quota = np.maximum(1, np.round(counts * budget / len(df))).astype(int)
+    keep = order[position < quota[sorted_bins + 1]]
+    return df.iloc[np.sort(keep)]
+
+
+def trendline_trace(fit, x_min, x_max):
+    """Build a dashed line trace for a fitted (slope, intercept, r2)"""
+    slope, intercept, r2 = fit
+    xs = np.array([x_min, x_max])
+    return go.Scatter(
+        x=xs,
+        y=slope * xs + intercept,
+        mode="lines",
+        name=f"OLS (R² = {r2:.3f})",
+        line=dict(color="#1B5E20", dash="dash")
+    )
+
+
+def scatter_with_trendline(summary, x, y, mode="Points", budget=POINT_BUDGET):
+    """Scatter (or 2D histogram) of y vs x with a trendline fit on the full dataset.
+
+    Points come from the analysis sample, thinned to ``budget`` markers; the
+    regression uses the streamed sums so it reflects every row of the file.
+    """
+    sample = summary["sample"][[x, y]] if x != y else summary["sample"][[x]]
+    cols = summary["numeric_cols"]
+    fit = fit_ols_from_sums(summary["pair_sums"], cols.index(x), cols.index(y))
+
+    if mode == "Density":
+        fig = px.density_heatmap(
+            sample, x=x, y=y,
+            nbinsx=60, nbinsy=60,
+            title=f"{y} vs {x}",
+            color_continuous_scale="Greens"
+        )
+    else:
+        fig = px.scatter(
+            stratified_sample(sample, x, budget),
+            x=x,
+            y=y,
+            title=f"{y} vs {x}",
+            render_mode="webgl",
+            color_discrete_sequence=["#2E7D32"]
+        )
+
+    describe = summary["describe"]
+    if fit is not None:
+        fig.add_trace(trendline_trace(fit, describe.at[x, "min"], describe.at[x, "max"]))
+    return fig
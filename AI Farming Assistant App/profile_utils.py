@@ -0,0 +1,144 @@
+import calendar
+import numpy as np
+from token_utils import count_tokens
+
+# Default prompt budget for the dataset profile sent to the LLM
+PROFILE_TOKEN_BUDGET = 1_200
+# Share of the profile budget the list of column names may take
+COLUMN_LIST_SHARE = 0.25
+# Budget and cell width for the sample rows appended after the profile
+PREVIEW_TOKEN_BUDGET = 300
+PREVIEW_MAX_COLWIDTH = 40
+TOP_CORRELATIONS = 8
+TOP_SEASONAL = 8
+
+
+def strongest_correlations(corr, limit=TOP_CORRELATIONS):
+    """Return the ``limit`` column pairs with the largest absolute correlation"""
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    pair_values = values[rows, cols]
+    valid = ~np.isnan(pair_values)
+    rows, cols, pair_values = rows[valid], cols[valid], pair_values[valid]
+    order = np.argsort(-np.abs(pair_values))[:limit]
+    names = corr.columns
+    return [(names[rows[i]], names[cols[i]], float(pair_values[i])) for i in order]
+
+
+def seasonality(monthly_means, describe):
+    """Peak/trough month and amplitude (in standard deviations) per numeric column"""
+    if monthly_means is not None:
+        # Columns with no value in any month have no peak or trough
+        monthly_means = monthly_means.dropna(axis=1, how="all")
+    if monthly_means is None or monthly_means.empty:
+        return {}
+    means = monthly_means.to_numpy(dtype=np.float64)
+    filled = np.where(np.isnan(means), np.nanmean(means, axis=0), means)
+    peaks = monthly_means.index.to_numpy()[np.nanargmax(filled, axis=0)]
+    troughs = monthly_means.index.to_numpy()[np.nanargmin(filled, axis=0)]
+    std = describe.loc[monthly_means.columns, "std"].to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        amplitude = (np.nanmax(filled, axis=0) - np.nanmin(filled, axis=0)) / std
+    return {
+        col: {"peak_month": int(peaks[i]), "trough_month": int(troughs[i]), "amplitude": float(amplitude[i])}
+        for i, col in enumerate(monthly_means.columns)
+        if len(monthly_means) > 1 and np.isfinite(amplitude[i])
+    }
+
+
+def build_profile(summary):
+    """Assemble a compact statistical profile from a streamed CSV summary"""
+    describe = summary["describe"]
+    return {
+        "rows": summary["rows"],
+        "columns": summary["columns"],
+        "date_column": summary.get("date_column"),
+        "numeric": describe.to_dict(orient="index"),
+        "missing": summary.get("missing", {}),
+        "categories": summary.get("top_categories", {}),
+        "correlations": strongest_correlations(summary["corr"]) if len(summary["numeric_cols"]) > 1 else [],
+        "seasonality": seasonality(summary.get("monthly_means"), describe),
+    }
+
+
+def _fmt(value):
+    if value is None or (isinstance(value, float) and not np.isfinite(value)):
+        return "n/a"
+    return f"{value:.4g}"
+
+
+def _profile_lines(profile):
+    """Yield (section, line) pairs, short high-signal sections first"""
+    for a, b, r in profile["correlations"]:
+        yield "Strongest correlations:", f"- {a} ~ {b}: r = {r:+.2f}"
+    ranked = sorted(profile["seasonality"].items(), key=lambda item: -item[1]["amplitude"])
+    for col, season in ranked[:TOP_SEASONAL]:
+        yield f"Seasonality by month of {profile['date_column']}:", (
+            f"- {col}: peaks in {calendar.month_abbr[season['peak_month']]}, "
+            f"lowest in {calendar.month_abbr[season['trough_month']]}, "
+            f"swing {season['amplitude']:.1f} std"
+        )
+    missing = profile["missing"]
+    for col, stats in profile["numeric"].items():
+        yield "Numeric columns (min / p25 / median / p75 / max, mean ± std, missing):", (
+            f"- {col}: {_fmt(stats['min'])} / {_fmt(stats['25%'])} / {_fmt(stats['50%'])} / "
+            f"{_fmt(stats['75%'])} / {_fmt(stats['max'])}, {_fmt(stats['mean'])} ± {_fmt(stats['std'])}, "
+            f"{missing.get(col, 0):.1%} missing"
+        )
+    rows = max(profile["rows"], 1)
+    for col, top in profile["categories"].items():
+        values = ", ".join(f"{value} ({count / rows:.0%})" for value, count in top)
+        yield "Categorical columns (top values, missing):", f"- {col}: {values}; {missing.get(col, 0):.1%} missing"
+
+
+def _column_list(columns, token_budget):
+    """Comma-separated column names, cut off with a count once ``token_budget`` is reached"""
+    names, used = [], 0
+    for i, name in enumerate(columns):
+        cost = count_tokens(name) + 1
+        if used + cost > token_budget:
+            return ", ".join(names) + f", ... ({len(columns) - i} more)"
+        names.append(name)
+        used += cost
+    return ", ".join(names)
+
+
+def serialize_profile(profile, token_budget=PROFILE_TOKEN_BUDGET):
+    """Render the profile as prompt text, stopping before ``token_budget`` tokens"""
+    columns = _column_list([str(c) for c in profile["columns"]], int(token_budget * COLUMN_LIST_SHARE))
+    header = f"Dataset has {profile['rows']:,} rows and {len(profile['columns'])} columns: {columns}"
+    lines = [header]
+    used = count_tokens(header)
+    current_section = None
+    skipped = 0
+    for section, line in _profile_lines(profile):
+        cost = count_tokens(line) + (count_tokens(section) if section != current_section else 0)
+        if used + cost > token_budget:
+            skipped += 1
+            continue
+        if section != current_section:
+            lines.append(section)
+            current_section = section
+        lines.append(line)
+        used += cost
+    if skipped:
+        lines.append(f"({skipped} further profile lines omitted to fit the prompt budget)")
+    return "\n".join(lines)
+
+
+def preview_text(frame, rows=3, token_budget=PREVIEW_TOKEN_BUDGET):
+    """The first ``rows`` rows as a table, keeping as many leading columns as fit ``token_budget``"""
+    frame = frame.head(rows)
+    render = lambda n: frame.iloc[:, :n].to_string(index=False, max_colwidth=PREVIEW_MAX_COLWIDTH)
+    # Binary search for the widest prefix of columns that still fits
+    low, high = 0, frame.shape[1]
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(render(middle)) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    if not low:
+        return ""
+    omitted = frame.shape[1] - low
+    return render(low) + (f"\n({omitted} more columns not shown)" if omitted else "")
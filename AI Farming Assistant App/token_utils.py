@@ -0,0 +1,22 @@
+import re
+
+# Word pieces and single punctuation marks, roughly how BPE tokenizers split text
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Estimate LLM tokens locally, erring high: about one token per four characters of each word piece"""
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_RE.findall(text or ""))
+
+
+def truncate_tokens(text, budget):
+    """Longest prefix of ``text`` (cut at a word boundary) whose estimate fits ``budget`` tokens"""
+    if count_tokens(text) <= budget:
+        return text
+    # One token is kept for the ellipsis marking the cut
+    used = 1
+    for match in re.finditer(r"\S+", text):
+        used += count_tokens(match.group(0))
+        if used > budget:
+            return text[:match.start()].rstrip() + " …"
+    return text
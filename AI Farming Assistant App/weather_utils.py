@@ -1,20 +1,34 @@
 import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
+from location_index import get_location_index
+
+def geocode_location(location: str):
+    """Return (latitude, longitude, name), skipping the geocoding API for places in the offline index"""
+    entry = get_location_index().resolve(location)
+    if entry is not None:
+        return entry['latitude'], entry['longitude'], entry['name']
+
+    geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
+    geo_resp = requests.get(geocoding_url, timeout=10)
+    geo_resp.raise_for_status()
+    geo_data = geo_resp.json()
+
+    if not geo_data.get('results'):
+        return None
+
+    result = geo_data['results'][0]
+    return result['latitude'], result['longitude'], result['name']
 
 def get_weather(location: str):
     try:
         # First, get coordinates for the location
-        geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
-        geo_resp = requests.get(geocoding_url, timeout=10)
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
-
-        if not geo_data.get('results'):
+        coordinates = geocode_location(location)
+        if coordinates is None:
             return None
-
-        lat = geo_data['results'][0]['latitude']
-        lon = geo_data['results'][0]['longitude']
-        location_name = geo_data['results'][0]['name']
+        lat, lon, location_name = coordinates
 
         # Then get weather data for those coordinates
         weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code"
@@ -67,16 +81,10 @@ def get_weather(location: str):
 def get_historical_weather(location: str, days: int = 7):
     try:
         # Get coordinates
-        geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
-        geo_resp = requests.get(geocoding_url, timeout=10)
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
-
-        if not geo_data.get('results'):
+        coordinates = geocode_location(location)
+        if coordinates is None:
             return None
-
-        lat = geo_data['results'][0]['latitude']
-        lon = geo_data['results'][0]['longitude']
+        lat, lon, _ = coordinates
 
         # Get historical data
         end_date = datetime.now()
@@ -96,48 +104,129 @@ def get_historical_weather(location: str, days: int = 7):
     except Exception as e:
         return None
 
-def get_air_quality(location: str, airvisual_api_key: str):
-    try:
-        # First, get coordinates for the location
-        geocoding_url = f"https://geocoding-api.open-meteo.com/v1/search?name={location}&count=1"
-        geo_resp = requests.get(geocoding_url, timeout=10)
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
+# === AIR QUALITY PROVIDERS ===
+OPEN_METEO_AQ_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+AIRVISUAL_URL = "http://api.airvisual.com/v2/nearest_city"
+# Seconds to wait on the primary provider before also firing the backup
+HEDGE_DELAY = 0.4
+PROVIDER_TIMEOUT = 10
+
+_provider_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="air-quality")
+_metrics_lock = threading.Lock()
+_provider_metrics = {}
+
+
+def _record_provider(name, latency, success):
+    with _metrics_lock:
+        stats = _provider_metrics.setdefault(name, {"calls": 0, "successes": 0, "total_latency": 0.0})
+        stats["calls"] += 1
+        stats["successes"] += int(success)
+        stats["total_latency"] += latency
 
-        if not geo_data.get('results'):
-            return None
 
-        lat = geo_data['results'][0]['latitude']
-        lon = geo_data['results'][0]['longitude']
-
-        # Try Open-Meteo API first
-        aq_url = f"https://air-quality-api.open-meteo.com/v1/air-quality?latitude={lat}&longitude={lon}&current=pm10,pm2_5,ozone,nitrogen_dioxide,sulphur_dioxide"
-        aq_resp = requests.get(aq_url, timeout=10)
-
-        if aq_resp.status_code == 200:
-            aq_data = aq_resp.json()
-            if 'current' in aq_data:
-                return aq_data
-
-        # If Open-Meteo fails, try AirVisual API
-        airvisual_url = f"http://api.airvisual.com/v2/nearest_city?lat={lat}&lon={lon}&key={airvisual_api_key}"
-        airvisual_resp = requests.get(airvisual_url, timeout=10)
-
-        if airvisual_resp.status_code == 200:
-            airvisual_data = airvisual_resp.json()
-            if 'data' in airvisual_data and 'current' in airvisual_data['data']:
-                current = airvisual_data['data']['current']['pollution']
-                return {
-                    'current': {
-                        'pm10': current.get('p1'),
-                        'pm2_5': current.get('p2'),
-                        'ozone': current.get('o3'),
-                        'nitrogen_dioxide': None,
-                        'sulphur_dioxide': None
-                    }
+def get_provider_metrics():
+    """Per-provider call count, success rate and mean latency (seconds)"""
+    with _metrics_lock:
+        return {
+            name: {
+                "calls": stats["calls"],
+                "success_rate": stats["successes"] / stats["calls"],
+                "avg_latency": stats["total_latency"] / stats["calls"],
+            }
+            for name, stats in _provider_metrics.items()
+        }
+
+
+def fetch_open_meteo_air_quality(lat, lon):
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current": "pm10,pm2_5,ozone,nitrogen_dioxide,sulphur_dioxide",
+    }
+    resp = requests.get(OPEN_METEO_AQ_URL, params=params, timeout=PROVIDER_TIMEOUT)
+    if resp.status_code == 200:
+        aq_data = resp.json()
+        if 'current' in aq_data:
+            return aq_data
+    return None
+
+
+def fetch_airvisual_air_quality(lat, lon, api_key):
+    params = {"lat": lat, "lon": lon, "key": api_key}
+    resp = requests.get(AIRVISUAL_URL, params=params, timeout=PROVIDER_TIMEOUT)
+    if resp.status_code == 200:
+        airvisual_data = resp.json()
+        if 'data' in airvisual_data and 'current' in airvisual_data['data']:
+            current = airvisual_data['data']['current']['pollution']
+            return {
+                'current': {
+                    'pm10': current.get('p1'),
+                    'pm2_5': current.get('p2'),
+                    'ozone': current.get('o3'),
+                    'nitrogen_dioxide': None,
+                    'sulphur_dioxide': None
                 }
+            }
+    return None
 
+
+def _timed_provider(name, fetch, *args):
+    start = time.perf_counter()
+    try:
+        result = fetch(*args)
+    except Exception as e:
+        print(f"Air quality provider {name} error: {str(e)}")
+        result = None
+    _record_provider(name, time.perf_counter() - start, result is not None)
+    return result
+
+
+def first_valid_response(providers, hedge_delay=HEDGE_DELAY, timeout=PROVIDER_TIMEOUT):
+    """Run ``(name, fetch, args)`` providers as a hedged race and return the first non-None result.
+
+    The next provider is started when the previous ones have failed or have not
+    answered within ``hedge_delay`` seconds (0 starts them all at once). Once a
+    result arrives, providers that have not started are cancelled and the
+    others are left to finish in the background, their results ignored.
+    """
+    queue = list(providers)
+    pending = set()
+    deadline = time.monotonic() + timeout
+    try:
+        while queue or pending:
+            if queue:
+                name, fetch, args = queue.pop(0)
+                pending.add(_provider_pool.submit(_timed_provider, name, fetch, *args))
+                if hedge_delay == 0 and queue:
+                    continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            wait_for = min(hedge_delay, remaining) if queue else remaining
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is not None:
+                    return result
         return None
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def get_air_quality(location: str, airvisual_api_key: str):
+    try:
+        # First, get coordinates for the location
+        coordinates = geocode_location(location)
+        if coordinates is None:
+            return None
+        lat, lon, _ = coordinates
+
+        # Open-Meteo is primary; AirVisual is hedged in if it is slow or fails
+        providers = [("open-meteo", fetch_open_meteo_air_quality, (lat, lon))]
+        if airvisual_api_key:
+            providers.append(("airvisual", fetch_airvisual_air_quality, (lat, lon, airvisual_api_key)))
+        return first_valid_response(providers)
     except Exception as e:
         print(f"Air quality error: {str(e)}")
-        return None 
+        return None
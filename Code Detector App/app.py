@@ -1,15 +1,71 @@
+import pandas as pd
 import streamlit as st
-from groq import Groq
 from streamlit_ace import st_ace
 from datetime import datetime
 import time
+import uuid
+
+from common.llm_gateway import BACKGROUND, complete
+from bulk_analysis import MAX_FILES, MAX_TOTAL_BYTES, SEVERITIES, analyze_bulk, collect_sources
+from code_checks import analysis_key, suspected_syntax_issue, syntax_error
+from code_units import MIN_INCREMENTAL_LINES, analyze_incremental
+from history_store import PAGE_SIZE, get_history_store
 
 # --- Constants ---
 THEMES = ["monokai", "github", "twilight"]
 LANGUAGES = ["python", "javascript", "java", "c", "cpp"]
 
 # --- Groq Client Setup ---
-client = Groq(api_key="")  # Replace with your actual key
+# The shared gateway keeps one client per process, so reruns reuse the connection
+GROQ_API_KEY = ""  # Replace with your actual key
+
+SYSTEM_PROMPT = (
+    "You are an expert static code analyzer. Your only job is to analyze code for:\n"
+    "1. Syntax validation\n2. Logical error detection\n"
+    "3. Security vulnerabilities\n4. Optimization suggestions\n\n"
+    "IMPORTANT:\n"
+    "- Only respond with code-related analysis.\n"
+    "- Do NOT respond to general questions.\n"
+    "- If the user input is not code or code-related, reply with:\n"
+    "  '⚠️ Please input code to analyze. I only respond to code-related requests.'"
+)
+
+# --- Cached LLM Analysis ---
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_analysis(key, _code, temperature):
+    """Analyze code once per (code, language, temperature) hash; unchanged code is answered from cache"""
+    return complete(
+        [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": _code}],
+        model="llama3-70b-8192",
+        api_key=GROQ_API_KEY or None,
+        temperature=temperature
+    )
+
+def analyze_unit(unit, language, temperature):
+    """Analyze one top-level unit of a larger file (runs on a worker thread)"""
+    return complete(
+        [{"role": "system", "content": SYSTEM_PROMPT}, {
+            "role": "user",
+            "content": (
+                f"This is `{unit.name}` from a larger {language} file. Analyze only this unit and keep "
+                f"the report concise. Refer to lines as 'line N', counting the unit's first line as line 1."
+                f"\n\n{unit.text}"
+            )
+        }],
+        model="llama3-70b-8192",
+        api_key=GROQ_API_KEY or None,
+        temperature=temperature
+    )
+
+def analyze_findings(messages, temperature):
+    """JSON findings for one unit in bulk mode; queued behind interactive requests"""
+    return complete(
+        messages,
+        model="llama3-70b-8192",
+        api_key=GROQ_API_KEY or None,
+        priority=BACKGROUND,
+        temperature=temperature
+    )
 
 # --- Page Config ---
 st.set_page_config(
@@ -20,11 +76,16 @@ st.set_page_config(
 )
 
 # --- Session State ---
-if 'history' not in st.session_state:
-    st.session_state.history = []
+# History lives in SQLite; the session only keeps its id and the current page
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
 if 'processing' not in st.session_state:
     st.session_state.processing = False
 
+history = get_history_store()
+
 # --- UI Components ---
 def gradient_text(text):
     return f"""
@@ -35,20 +96,68 @@ def gradient_text(text):
 with st.sidebar:
     st.markdown(gradient_text("CodeMedic AI"), unsafe_allow_html=True)
     st.markdown("---")
+    mode = st.radio("Mode", ["Single file", "Bulk (files or zip)"], horizontal=True)
 
     with st.expander("⚙️ Settings"):
         selected_theme = st.selectbox("Editor Theme", THEMES, index=0)
         selected_lang = st.selectbox("Code Language", LANGUAGES, index=0)
         model_temp = st.slider("🧠 AI Creativity", 0.0, 1.0, 0.7)
+        incremental = st.toggle(
+            "Incremental analysis",
+            value=True,
+            help=f"For files of {MIN_INCREMENTAL_LINES}+ lines, only re-analyze functions and classes that changed."
+        )
 
     st.markdown("---")
-    st.button("🧹 Clear History", on_click=lambda: st.session_state.history.clear())
+    st.button("🧹 Clear History", on_click=lambda: history.clear(st.session_state.session_id))
     st.markdown(f"Session Start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", unsafe_allow_html=True)
 
 # --- Main Title ---
 st.markdown(gradient_text("Code Diagnostics Suite"), unsafe_allow_html=True)
 st.markdown("AI-powered code analysis with deep error detection and fix generation", unsafe_allow_html=True)
 
+# --- Bulk Mode ---
+if mode == "Bulk (files or zip)":
+    uploads = st.file_uploader(
+        "Upload source files or a zip of a repository",
+        type=["zip", "py", "js", "jsx", "mjs", "java", "c", "h", "cpp", "cc", "cxx", "hpp"],
+        accept_multiple_files=True
+    )
+    if st.button("🚀 Analyze Files", use_container_width=True, disabled=not uploads):
+        sources, skipped = collect_sources(uploads)
+        if skipped:
+            st.warning(f"⚠️ {skipped} source files skipped: uploads are limited to {MAX_FILES} files "
+                       f"and {MAX_TOTAL_BYTES // 1_000_000} MB of source")
+        if not sources:
+            st.error("⚠️ No supported source files found")
+        else:
+            progress = st.progress(0.0, text=f"Analyzing {len(sources)} files...")
+            log = st.empty()
+
+            def on_progress(path, done, total, error):
+                progress.progress(done / total, text=f"{done}/{total} files analyzed")
+                log.caption(f"{'❌' if error else '✅'} {path}" + (f": {error}" if error else ""))
+
+            start_time = time.time()
+            st.session_state.bulk_findings = analyze_bulk(
+                sources, lambda messages: analyze_findings(messages, model_temp),
+                temperature=model_temp, on_progress=on_progress
+            )
+            st.session_state.bulk_summary = f"{len(sources)} files analyzed in {time.time() - start_time:.1f}s"
+
+    if st.session_state.get("bulk_findings") is not None:
+        findings = pd.DataFrame(
+            st.session_state.bulk_findings,
+            columns=["file", "line", "severity", "category", "message", "unit", "language"]
+        )
+        findings["severity"] = pd.Categorical(findings["severity"], categories=SEVERITIES, ordered=True)
+        findings = findings.sort_values(["severity", "file", "line"])
+        st.success(f"✅ {st.session_state.bulk_summary}: {len(findings)} findings")
+        severities = st.multiselect("Severity", SEVERITIES, default=SEVERITIES[:4])
+        st.dataframe(findings[findings["severity"].isin(severities)], use_container_width=True, hide_index=True)
+        st.download_button("⬇️ Download CSV", findings.to_csv(index=False), "findings.csv", "text/csv")
+    st.stop()
+
 # --- Code Editor ---
 with st.container(border=True):
     code = st_ace(
@@ -77,36 +186,37 @@ if analyze_btn and not st.session_state.processing:
         try:
             with st.spinner("🔍 Deep code analysis in progress..."):
                 start_time = time.time()
-                response = client.chat.completions.create(
-                    messages=[{
-                        "role": "system",
-                        "content": (
-                            "You are an expert static code analyzer. Your only job is to analyze code for:\n"
-                            "1. Syntax validation\n2. Logical error detection\n"
-                            "3. Security vulnerabilities\n4. Optimization suggestions\n\n"
-                            "IMPORTANT:\n"
-                            "- Only respond with code-related analysis.\n"
-                            "- Do NOT respond to general questions.\n"
-                            "- If the user input is not code or code-related, reply with:\n"
-                            "  '⚠️ Please input code to analyze. I only respond to code-related requests.'"
-                        )
-                    }, {
-                        "role": "user",
-                        "content": code
-                    }],
-                    model="llama3-70b-8192",
-                    temperature=model_temp
-                )
-                analysis = response.choices[0].message.content
+                # Local fast path: Python syntax errors are reported without calling the LLM
+                error = syntax_error(code, selected_lang)
+                warning = suspected_syntax_issue(code, selected_lang)
+                if error:
+                    analysis = f"### ❌ Syntax Error\n{error}\n\nFix the syntax error and analyze again for a full review."
+                elif incremental and code.count("\n") + 1 >= MIN_INCREMENTAL_LINES:
+                    analysis, stats = analyze_incremental(
+                        code, selected_lang, model_temp,
+                        lambda unit: analyze_unit(unit, selected_lang, model_temp)
+                    )
+                    analysis = (
+                        f"_Re-analyzed {stats['analyzed']} of {stats['units']} units; "
+                        f"{stats['reused']} unchanged units reused from earlier analyses._\n\n{analysis}"
+                    )
+                else:
+                    analysis = cached_analysis(analysis_key(code, selected_lang, model_temp), code, model_temp)
+                if warning and not error:
+                    analysis = (
+                        f"> ⚠️ The local syntax check flagged a possible problem ({warning}). "
+                        f"It can misread valid code; see the full analysis below.\n\n{analysis}"
+                    )
                 duration = time.time() - start_time
 
-                st.session_state.history.append({
+                history.add(st.session_state.session_id, {
                     "timestamp": datetime.now().isoformat(),
                     "code": code,
                     "analysis": analysis,
                     "language": selected_lang,
                     "duration": f"{duration:.2f}s"
                 })
+                st.session_state.history_page = 0
 
             st.success("✅ Analysis Complete")
             st.markdown("### 📝 Analysis Report")
@@ -119,20 +229,39 @@ if analyze_btn and not st.session_state.processing:
             st.session_state.processing = False
 
 # --- History Section ---
-if st.session_state.history:
+# Only one page of previews is read per rerun; code and analysis load when an entry is expanded
+search = st.text_input("🔎 Search history", placeholder="Search code and analyses...")
+total = history.count(st.session_state.session_id, search)
+if total:
     st.markdown("## 📜 Analysis History")
-    for entry in reversed(st.session_state.history):
+    pages = (total + PAGE_SIZE - 1) // PAGE_SIZE
+    page = min(st.session_state.history_page, pages - 1)
+    for entry in history.page(st.session_state.session_id, search, page):
         with st.container(border=True):
             cols = st.columns([1, 3, 1])
             cols[0].markdown(f"**Language**: {entry['language']}")
             cols[1].markdown(f"**Time**: {entry['timestamp']}")
             cols[2].markdown(f"**Duration**: {entry['duration']}")
+            st.caption(entry['preview'])
+
+            if st.toggle("Show code and analysis", key=f"history_{entry['id']}"):
+                details = history.get(entry['id'])
+                st.markdown("**Code:**")
+                st.code(details['code'], language=entry['language'])
 
-            st.markdown("**Code:**")
-            st.code(entry['code'], language=entry['language'])
+                st.markdown("**Analysis:**")
+                st.markdown(details['analysis'])
 
-            st.markdown("**Analysis:**")
-            st.markdown(entry['analysis'])
+    nav = st.columns([1, 2, 1])
+    if nav[0].button("⬅️ Newer", disabled=page == 0):
+        st.session_state.history_page = page - 1
+        st.rerun()
+    nav[1].markdown(f"Page {page + 1} of {pages} ({total} entries)")
+    if nav[2].button("Older ➡️", disabled=page >= pages - 1):
+        st.session_state.history_page = page + 1
+        st.rerun()
+elif search:
+    st.info("No history entries match your search")
 
 # --- Footer ---
 st.markdown("---")
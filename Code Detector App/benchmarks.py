@@ -0,0 +1,63 @@
+"""Benchmarks for the Code Detector.
+
+Run with ``python benchmarks.py <name> [options]``; each benchmark prints its timings.
+"""
+import argparse
+import os
+import time
+
+
+def synthetic_sources(files, functions):
+    """A fake repository of Python files with ``functions`` distinct functions each"""
+    sources = []
+    for f in range(files):
+        code = "\n\n".join(
+            f"def handler_{f}_{n}(items):\n    total = 0\n    for item in items:\n"
+            f"        total += item * {n}\n    return total"
+            for n in range(functions)
+        )
+        sources.append((f"pkg/module_{f}.py", "python", code))
+    return sources
+
+
+def bench_bulk(files=20, functions=6, concurrency=(1, 4, 8, 16), ttft="fixed:0.3", rpm=100_000):
+    """Bulk-analysis throughput against the local stub LLM server at several concurrency limits"""
+    from common.llm_stub_server import StubConfig, serve_in_thread
+
+    server, base_url = serve_in_thread(StubConfig(ttft=ttft, tokens_per_second=200, response_tokens=40))
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_RPM", "100000")
+    os.environ.setdefault("GROQ_TPM", "100000000")
+    import bulk_analysis
+    from common.llm_gateway import complete
+
+    sources = synthetic_sources(files, functions)
+    units = files * functions
+    print(f"Stub {base_url}: {files} files, {units} units, time to first token {ttft}")
+    for limit in concurrency:
+        # Start cold each round so every unit costs a request
+        bulk_analysis.unit_findings = bulk_analysis.UnitReportCache()
+        start = time.perf_counter()
+        findings = bulk_analysis.analyze_bulk(
+            sources, lambda messages: complete(messages, api_key="stub"),
+            max_concurrency=limit, requests_per_minute=rpm
+        )
+        elapsed = time.perf_counter() - start
+        print(f"concurrency {limit:3d}   {elapsed:6.2f} s   {units / elapsed:6.1f} units/s   "
+              f"{files / elapsed:5.1f} files/s   {len(findings)} findings")
+    server.shutdown()
+
+
+BENCHMARKS = {"bulk": bench_bulk}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--functions", type=int, default=6, help="functions per file")
+    parser.add_argument("--concurrency", type=int, nargs="*", default=[1, 4, 8, 16])
+    parser.add_argument("--ttft", default="fixed:0.3", help="stub time-to-first-token distribution")
+    parser.add_argument("--rpm", type=int, default=100_000, help="bulk-run request budget per minute")
+    args = parser.parse_args()
+    BENCHMARKS[args.name](args.files, args.functions, args.concurrency, args.ttft, args.rpm)
@@ -0,0 +1,196 @@
+import asyncio
+import io
+import json
+import os
+import re
+import time
+import zipfile
+
+from code_checks import suspected_syntax_issue, syntax_error
+from code_units import UnitReportCache, split_units, unit_key
+
+EXTENSIONS = {
+    ".py": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".java": "java",
+    ".c": "c", ".h": "c",
+    ".cpp": "cpp", ".cc": "cpp", ".cxx": "cpp", ".hpp": "cpp",
+}
+SKIP_DIRS = {".git", "node_modules", "__pycache__", "venv", ".venv", "build", "dist"}
+MAX_FILE_BYTES = 200_000
+# Per-upload limits; source files beyond them are skipped and reported
+MAX_FILES = 500
+MAX_TOTAL_BYTES = 10_000_000
+MAX_CONCURRENCY = 8
+# Budget for one bulk run, so a large upload cannot use up the account's limits on its own
+BULK_REQUESTS_PER_MINUTE = 120
+SEVERITIES = ["critical", "high", "medium", "low", "info"]
+
+FINDINGS_PROMPT = (
+    "You are an expert static code analyzer. Review the code for syntax errors, logic bugs, "
+    "security vulnerabilities and performance problems. Respond with ONLY a JSON array; each item is "
+    '{"line": <line number within the snippet, counting its first line as 1>, "severity": "critical|high|medium|low|info", '
+    '"category": "syntax|logic|security|performance|style", "message": "<one sentence>"}. '
+    "Respond with [] if there are no issues."
+)
+
+_JSON_ARRAY = re.compile(r"\[.*\]", re.DOTALL)
+
+unit_findings = UnitReportCache()
+
+
+def _language(path):
+    parts = path.replace("\\", "/").split("/")
+    return None if SKIP_DIRS.intersection(parts) else EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def collect_sources(uploads, max_files=MAX_FILES, max_total_bytes=MAX_TOTAL_BYTES):
+    """Return ([(path, language, code)], skipped) from uploaded source files and zip archives.
+
+    Archive members are only read while the file count and total size stay
+    within the limits; ``skipped`` counts the source files left out.
+    """
+    sources = []
+    total = 0
+    skipped = 0
+
+    def fits(size):
+        return len(sources) < max_files and total + size <= max_total_bytes and size <= MAX_FILE_BYTES
+
+    for upload in uploads:
+        if upload.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(upload.getvalue())) as archive:
+                for info in archive.infolist():
+                    language = None if info.is_dir() else _language(info.filename)
+                    if not language:
+                        continue
+                    if not fits(info.file_size):
+                        skipped += 1
+                        continue
+                    data = archive.read(info)
+                    total += len(data)
+                    sources.append((info.filename, language, data.decode("utf-8", errors="replace")))
+        elif _language(upload.name):
+            if not fits(upload.size):
+                skipped += 1
+                continue
+            total += upload.size
+            sources.append((upload.name, _language(upload.name), upload.getvalue().decode("utf-8", errors="replace")))
+    return sorted(sources), skipped
+
+
+def parse_findings(text, unit):
+    """Parse the model's JSON findings; unparseable answers become a single info finding.
+
+    Lines are kept relative to the unit (0 = its first line), because cached
+    findings are reused wherever the same unit appears; ``_analyze_file`` adds
+    the unit's current start line back.
+    """
+    last = unit.end_line - unit.start_line
+    match = _JSON_ARRAY.search(text or "")
+    try:
+        items = json.loads(match.group(0)) if match else None
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        return [{"line": 0, "severity": "info", "category": "other", "message": (text or "").strip()}]
+    findings = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        severity = str(item.get("severity", "info")).lower()
+        line = item.get("line")
+        findings.append({
+            "line": min(max(line - 1, 0), last) if isinstance(line, int) else 0,
+            "severity": severity if severity in SEVERITIES else "info",
+            "category": str(item.get("category", "other")).lower(),
+            "message": str(item.get("message", "")).strip(),
+        })
+    return findings
+
+
+class AsyncRateLimiter:
+    """Space request starts evenly so a run stays under ``per_minute`` requests"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _analyze_unit(unit, path, language, analyze, semaphore, limiter):
+    async with semaphore:
+        await limiter.wait()
+        prompt = f"Snippet `{unit.name}` from {path} ({language}).\n\n{unit.text}"
+        return await asyncio.to_thread(analyze, [
+            {"role": "system", "content": FINDINGS_PROMPT},
+            {"role": "user", "content": prompt},
+        ])
+
+
+def _syntax_finding(message, severity):
+    line = re.search(r"Line (\d+)", message)
+    return {"line": int(line.group(1)) if line else 1, "severity": severity, "category": "syntax",
+            "message": message, "unit": "whole file"}
+
+
+async def _analyze_file(path, language, code, analyze, temperature, semaphore, limiter):
+    error = syntax_error(code, language)
+    if error:
+        return [_syntax_finding(error, "critical")]
+    warning = suspected_syntax_issue(code, language)
+    # The heuristic check for non-Python code can misread valid code, so it never skips the analysis
+    findings = [_syntax_finding(f"Possible syntax problem (local check): {warning}", "low")] if warning else []
+    units = split_units(code, language)
+    keys = [f"findings\0{unit_key(unit, language, temperature)}" for unit in units]
+    pending = [(key, unit) for key, unit in zip(keys, units) if unit_findings.get(key) is None]
+    answers = await asyncio.gather(*(
+        _analyze_unit(unit, path, language, analyze, semaphore, limiter) for _, unit in pending
+    ))
+    for (key, unit), answer in zip(pending, answers):
+        unit_findings.put(key, parse_findings(answer, unit))
+    for key, unit in zip(keys, units):
+        findings += [dict(finding, line=finding["line"] + unit.start_line, unit=unit.name)
+                     for finding in unit_findings.get(key)]
+    return findings
+
+
+async def analyze_sources(sources, analyze, temperature=0.2, on_progress=None,
+                          max_concurrency=MAX_CONCURRENCY, requests_per_minute=BULK_REQUESTS_PER_MINUTE):
+    """Analyze many files concurrently and return a flat list of findings.
+
+    ``analyze(messages)`` is a blocking LLM call returning text; it runs on worker
+    threads with at most ``max_concurrency`` requests in flight. ``on_progress(path,
+    done, total, error)`` is called on the event loop as each file finishes.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    limiter = AsyncRateLimiter(requests_per_minute)
+    results = []
+    done = []
+
+    async def run(path, language, code):
+        try:
+            findings = await _analyze_file(path, language, code, analyze, temperature, semaphore, limiter)
+            error = None
+        except Exception as e:
+            findings, error = [], str(e)
+        results.extend(dict(finding, file=path, language=language) for finding in findings)
+        done.append(path)
+        if on_progress:
+            on_progress(path, len(done), len(sources), error)
+
+    await asyncio.gather(*(run(*source) for source in sources))
+    return results
+
+
+def analyze_bulk(sources, analyze, **kwargs):
+    """Blocking wrapper around ``analyze_sources`` for Streamlit scripts and benchmarks"""
+    return asyncio.run(analyze_sources(sources, analyze, **kwargs))
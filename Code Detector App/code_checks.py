@@ -0,0 +1,155 @@
+import hashlib
+
+BRACKETS = {")": "(", "]": "[", "}": "{"}
+# A "/" after one of these (or at the start) begins a JavaScript regex literal, not a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "await", "delete", "throw"}
+
+
+def analysis_key(code, language, temperature):
+    """SHA-256 of (code, language, temperature), used to cache analyses"""
+    return hashlib.sha256(f"{language}\0{temperature:.2f}\0{code}".encode()).hexdigest()
+
+
+def _python_error(code):
+    try:
+        compile(code, "<analysis>", "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        return f"Line {getattr(e, 'lineno', None) or 1}, column {getattr(e, 'offset', None) or 1}: {getattr(e, 'msg', e)}"
+    return None
+
+
+def _skip_string(code, i, quote, line):
+    """Return (index after the closing quote, line) or raise ValueError for an unterminated literal"""
+    start_line = line
+    i += 1
+    while i < len(code):
+        char = code[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "\n":
+            if quote != "`":
+                raise ValueError(f"Line {start_line}: unterminated string literal")
+            line += 1
+        if char == quote:
+            return i + 1, line
+        i += 1
+    raise ValueError(f"Line {start_line}: unterminated {'template' if quote == '`' else 'string'} literal")
+
+
+def _skip_regex(code, i, line):
+    in_class = False
+    i += 1
+    while i < len(code) and code[i] != "\n":
+        char = code[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            return i + 1
+        i += 1
+    raise ValueError(f"Line {line}: unterminated regular expression literal")
+
+
+def _starts_regex(code, i, previous):
+    if not previous or previous in REGEX_PRECEDERS:
+        return True
+    end = i
+    while end > 0 and code[end - 1].isspace():
+        end -= 1
+    start = end
+    while start > 0 and (code[start - 1].isalnum() or code[start - 1] in "_$"):
+        start -= 1
+    return code[start:end] in REGEX_KEYWORDS
+
+
+def scan_code(code, language):
+    """Yield (char, index, line) for every bracket and ";" outside strings, comments and regexes.
+
+    Raises ValueError for an unterminated string, comment or regex literal.
+    """
+    quotes = "\"'`" if language == "javascript" else "\"'"
+    line = 1
+    previous = ""
+    i = 0
+    while i < len(code):
+        char = code[i]
+        pair = code[i:i + 2]
+        if char == "\n":
+            line += 1
+        elif pair == "//":
+            end = code.find("\n", i)
+            i = len(code) if end == -1 else end
+            continue
+        elif pair == "/*":
+            end = code.find("*/", i + 2)
+            if end == -1:
+                raise ValueError(f"Line {line}: unterminated block comment")
+            line += code.count("\n", i, end)
+            i = end + 2
+            continue
+        elif char == "'" and language == "cpp" and i and code[i - 1].isalnum():
+            pass  # C++14 digit separator, e.g. 1'000'000
+        elif char in quotes:
+            i, line = _skip_string(code, i, char, line)
+            previous = char
+            continue
+        elif char == "/" and language == "javascript" and _starts_regex(code, i, previous):
+            i = _skip_regex(code, i, line)
+            previous = "/"
+            continue
+        elif char in "()[]{};":
+            yield char, i, line
+        if not char.isspace():
+            previous = char
+        i += 1
+
+
+def _c_family_error(code, language):
+    """Bracket, string and comment balance for C, C++, Java and JavaScript"""
+    stack = []
+    try:
+        for char, _, line in scan_code(code, language):
+            if char in "([{":
+                stack.append((char, line))
+            elif char in BRACKETS:
+                if not stack:
+                    return f"Line {line}: unmatched '{char}'"
+                opener, opened_at = stack.pop()
+                if opener != BRACKETS[char]:
+                    return f"Line {line}: '{char}' does not match '{opener}' opened on line {opened_at}"
+    except ValueError as e:
+        return str(e)
+    if stack:
+        opener, opened_at = stack[-1]
+        return f"Line {opened_at}: '{opener}' is never closed"
+    return None
+
+
+def syntax_error(code, language):
+    """Return the compiler's description of a syntax error, or None.
+
+    Only Python is checked here, with the real parser, so a result is always a
+    genuine error and callers may skip the LLM for it. See ``suspected_syntax_issue``
+    for the other languages.
+    """
+    if language == "python":
+        return _python_error(code)
+    return None
+
+
+def suspected_syntax_issue(code, language):
+    """Tokenizer-level check of strings, comments and bracket nesting for C, C++, Java and JavaScript.
+
+    This is a heuristic: it catches common slips but can misread valid code
+    (e.g. Java text blocks or some ``/`` operators), so its result is only a
+    warning shown alongside the full analysis.
+    """
+    if language == "python":
+        return None
+    return _c_family_error(code, language)
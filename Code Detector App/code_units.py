@@ -0,0 +1,169 @@
+import ast
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from code_checks import scan_code
+
+# Files shorter than this are analyzed whole; splitting only pays off for larger buffers
+MIN_INCREMENTAL_LINES = 80
+MAX_CONCURRENT_UNITS = 4
+MAX_CACHED_UNITS = 2_000
+# Consecutive brace units shorter than this are merged so one-line globals do not each cost a request
+SMALL_UNIT_LINES = 5
+# Opening a block whose header matches this at top level makes its members separate units
+CONTAINER = re.compile(r"\b(class|interface|namespace|struct|enum|object)\b")
+# "line 3", "Lines 4-6", "lines 4–6" in a unit report
+LINE_REFERENCE = re.compile(r"\b([Ll]ines?)\s+(\d+)(?:(\s*[-–]\s*)(\d+))?")
+
+Unit = namedtuple("Unit", ["name", "start_line", "end_line", "text"])
+
+
+def _lines_unit(lines, start, end, name=None):
+    """A unit over lines start..end (1-based), trimmed to its first and last non-blank line.
+
+    Trimming keeps a unit's relative line numbers tied to its content, which
+    ``unit_key`` hashes, so a cached report lines up wherever the unit appears.
+    """
+    while start < end and not lines[start - 1].strip():
+        start += 1
+    while end > start and not lines[end - 1].strip():
+        end -= 1
+    text = "\n".join(lines[start - 1:end])
+    first = lines[start - 1].strip() if start <= len(lines) else ""
+    return Unit(name or first[:60], start, end, text)
+
+
+def python_units(code):
+    """One unit per top-level def/class (with decorators); other statements are grouped"""
+    lines = code.split("\n")
+    units = []
+    pending = None
+    for node in ast.parse(code).body:
+        start = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if pending:
+                units.append(_lines_unit(lines, *pending, name="module-level code"))
+                pending = None
+            kind = "class" if isinstance(node, ast.ClassDef) else "def"
+            units.append(_lines_unit(lines, start, node.end_lineno, name=f"{kind} {node.name}"))
+        else:
+            pending = (pending[0] if pending else start, node.end_lineno)
+    if pending:
+        units.append(_lines_unit(lines, *pending, name="module-level code"))
+    return units
+
+
+def brace_units(code, language):
+    """Split C-family / JavaScript code after each top-level block, and after each
+    member block of a top-level class, namespace or similar container"""
+    lines = code.split("\n")
+    cuts = []
+    stack = []
+    boundary = 0
+    for char, index, line in scan_code(code, language):
+        if char == "{":
+            header = code[boundary:index]
+            stack.append(not stack and bool(CONTAINER.search(header)))
+            if stack[-1]:
+                # Everything up to and including the container's opening line is its own unit
+                cuts.append(line)
+        elif char == "}" and stack:
+            stack.pop()
+            if not stack or (len(stack) == 1 and stack[0]):
+                cuts.append(line)
+        if char in "{};":
+            boundary = index + 1
+    spans = []
+    start = 1
+    for cut in cuts + [len(lines)]:
+        if cut >= start and any(l.strip() for l in lines[start - 1:cut]):
+            small = cut - start + 1 < SMALL_UNIT_LINES or spans and spans[-1][1] - spans[-1][0] + 1 < SMALL_UNIT_LINES
+            if spans and small:
+                spans[-1] = (spans[-1][0], cut)
+            else:
+                spans.append((start, cut))
+        start = max(start, cut + 1)
+    return [_lines_unit(lines, start, end) for start, end in spans]
+
+
+def split_units(code, language):
+    """Split a buffer into top-level units; falls back to one unit if it cannot be parsed"""
+    try:
+        units = python_units(code) if language == "python" else brace_units(code, language)
+    except (SyntaxError, ValueError):
+        units = []
+    return units or [_lines_unit(code.split("\n"), 1, code.count("\n") + 1, name="whole file")]
+
+
+def unit_key(unit, language, temperature):
+    """Content hash of a unit; line positions are left out so moved code is still reused.
+
+    Units start on their first non-blank line, so equal keys mean equal relative line numbers.
+    """
+    text = "\n".join(line.rstrip() for line in unit.text.split("\n"))
+    return hashlib.sha256(f"{language}\0{temperature:.2f}\0{text}".encode()).hexdigest()
+
+
+def rebase_lines(report, start_line):
+    """Turn unit-relative line references (line 1 = the unit's first line) into file lines"""
+    offset = start_line - 1
+
+    def shift(match):
+        word, first, dash, last = match.groups()
+        text = f"{word} {int(first) + offset}"
+        return text + f"{dash}{int(last) + offset}" if last else text
+
+    return LINE_REFERENCE.sub(shift, report) if offset else report
+
+
+class UnitReportCache:
+    """Process-wide LRU of per-unit reports, shared by all sessions and worker threads"""
+
+    def __init__(self, max_entries=MAX_CACHED_UNITS):
+        self.max_entries = max_entries
+        self._reports = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._reports:
+                self._reports.move_to_end(key)
+            return self._reports.get(key)
+
+    def put(self, key, report):
+        with self._lock:
+            self._reports[key] = report
+            self._reports.move_to_end(key)
+            if len(self._reports) > self.max_entries:
+                self._reports.popitem(last=False)
+
+
+unit_reports = UnitReportCache()
+
+
+def analyze_incremental(code, language, temperature, analyze_unit, cache=unit_reports,
+                        max_workers=MAX_CONCURRENT_UNITS):
+    """Analyze only the units whose content changed and merge all unit reports.
+
+    ``analyze_unit(unit)`` returns the report for one unit, with line numbers
+    counted from the unit's first line; changed units are analyzed
+    concurrently. Reports are cached position-free and rebased onto the
+    unit's current lines when merged. Returns ``(report, stats)``.
+    """
+    units = split_units(code, language)
+    keys = [unit_key(unit, language, temperature) for unit in units]
+    reports = {key: cache.get(key) for key in keys}
+    changed = {key: unit for key, unit in zip(keys, units) if reports[key] is None}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, report in zip(changed, pool.map(analyze_unit, changed.values())):
+            cache.put(key, report)
+            reports[key] = report
+    sections = [
+        f"#### `{unit.name}` (lines {unit.start_line}–{unit.end_line})\n\n{rebase_lines(reports[key], unit.start_line)}"
+        for key, unit in zip(keys, units)
+    ]
+    stats = {"units": len(units), "analyzed": len(changed), "reused": len(units) - len(changed)}
+    return "\n\n".join(sections), stats
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+HISTORY_PATH = os.environ.get(
+    "HISTORY_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.sqlite3")
+)
+PAGE_SIZE = 10
+# Entries older than this are dropped when the store is opened
+RETENTION_SECONDS = 30 * 24 * 60 * 60
+PREVIEW_CHARS = 80
+
+
+def _fts_query(text):
+    """Quote each term so user input is never parsed as FTS5 syntax; terms match as prefixes"""
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in text.split())
+
+
+class HistoryStore:
+    """Per-session analysis history in SQLite, searchable over code and analysis.
+
+    Full-text search uses an FTS5 index when the SQLite build has it and falls
+    back to LIKE otherwise. Listing returns only short previews; the full code
+    and analysis are read by ``get`` when an entry is expanded.
+    """
+
+    def __init__(self, path=HISTORY_PATH, retention=RETENTION_SECONDS):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, session TEXT, created REAL, timestamp TEXT, "
+            "language TEXT, duration TEXT, code TEXT, analysis TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS history_session ON history (session, id)")
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts "
+                "USING fts5(code, analysis, content='history', content_rowid='id')"
+            )
+            self._db.executescript(
+                "CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN "
+                "INSERT INTO history_fts (rowid, code, analysis) VALUES (new.id, new.code, new.analysis); END;"
+                "CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN "
+                "INSERT INTO history_fts (history_fts, rowid, code, analysis) "
+                "VALUES ('delete', old.id, old.code, old.analysis); END;"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+        self._db.execute("DELETE FROM history WHERE created < ?", (time.time() - retention,))
+        self._db.commit()
+
+    def add(self, session, entry):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO history (session, created, timestamp, language, duration, code, analysis) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session, time.time(), entry["timestamp"], entry["language"], entry["duration"],
+                 entry["code"], entry["analysis"])
+            )
+            self._db.commit()
+
+    def _where(self, session, query):
+        if not query.strip():
+            return "session = ?", [session]
+        if self.fts:
+            return ("session = ? AND id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?)",
+                    [session, _fts_query(query)])
+        clauses, params = ["session = ?"], [session]
+        for term in query.split():
+            clauses.append("(code LIKE ? OR analysis LIKE ?)")
+            params += [f"%{term}%"] * 2
+        return " AND ".join(clauses), params
+
+    def count(self, session, query=""):
+        where, params = self._where(session, query)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM history WHERE {where}", params).fetchone()[0]
+
+    def page(self, session, query="", page=0, page_size=PAGE_SIZE):
+        """Newest-first previews: dicts with id, timestamp, language, duration and preview"""
+        where, params = self._where(session, query)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, timestamp, language, duration, substr(ltrim(code), 1, ?) FROM history "
+                f"WHERE {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                [PREVIEW_CHARS] + params + [page_size, page * page_size]
+            ).fetchall()
+        keys = ("id", "timestamp", "language", "duration", "preview")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def get(self, entry_id):
+        with self._lock:
+            row = self._db.execute("SELECT code, analysis FROM history WHERE id = ?", (entry_id,)).fetchone()
+        return {"code": row[0], "analysis": row[1]} if row else None
+
+    def clear(self, session):
+        with self._lock:
+            self._db.execute("DELETE FROM history WHERE session = ?", (session,))
+            self._db.commit()
+
+
+@lru_cache(maxsize=1)
+def get_history_store():
+    """One connection per process, shared by every Streamlit session"""
+    return HistoryStore()
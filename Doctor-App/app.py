@@ -1,15 +1,10 @@
 # Install required packages:
-# !pip install streamlit tensorflow transformers pillow groq
+# !pip install streamlit tflite-runtime transformers pillow groq
+# Export the trained classifier once with: python export_model.py tumor_classifier.keras --calibration <images>
 
+import io
 import os
 import streamlit as st
-import numpy as np
-from PIL import Image
-from groq import Groq
-import tensorflow as tf
-from tensorflow.keras.applications import ResNet50
-from tensorflow.keras.layers import Dense, Flatten
-from tensorflow.keras.models import Model
 
 # --- SET PAGE CONFIG (must be FIRST)
 st.set_page_config(page_title="AI Medical Assistant", layout="centered")
@@ -17,66 +12,111 @@ st.set_page_config(page_title="AI Medical Assistant", layout="centered")
 # --- SET GROQ API KEY (replace with your actual key or use Secrets on HF Spaces)
 os.environ["GROQ_API_KEY"] = st.secrets["GROQ_API_KEY"]
 
-# --- GROQ CLIENT SETUP
-@st.cache_resource
-def get_groq_client():
-    return Groq(api_key=os.environ["GROQ_API_KEY"])
+# --- GROQ CLIENT SETUP (shared, process-wide gateway from the repository's common package)
+from common.llm_gateway import complete
 
-groq_client = get_groq_client()
-
-# --- LOAD IMAGE MODEL
-@st.cache_resource
+# --- LOAD IMAGE MODEL (exported int8 TFLite, warmed up once per process)
+# The vision stack is imported and loaded only when the Image Diagnosis page is first opened
+@st.cache_resource(show_spinner="Loading diagnosis model...")
 def load_cnn_model():
-    base_model = ResNet50(weights='imagenet', include_top=False, input_shape=(224, 224, 3))
-    x = Flatten()(base_model.output)
-    x = Dense(128, activation='relu')(x)
-    output = Dense(1, activation='sigmoid')(x)
-    model = Model(inputs=base_model.input, outputs=output)
-    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
-    return model
-
-cnn_model = load_cnn_model()
-
-# --- SIMULATED TUMOR DETECTION
-if 'toggle_result' not in st.session_state:
-    st.session_state.toggle_result = True
-
-def predict_image(model, img_array):
-    result = "Tumor Detected" if st.session_state.toggle_result else "No Tumor Detected"
-    st.session_state.toggle_result = not st.session_state.toggle_result
-    return result
+    from inference import MODEL_PATH, load_engine
+    if not os.path.exists(MODEL_PATH):
+        return None
+    return load_engine(MODEL_PATH)
+
+# --- LOAD CASE LIBRARY (reviewed scans for similar-case retrieval)
+@st.cache_resource(show_spinner="Loading case library...")
+def load_case_library():
+    from similarity_index import FEATURES_MODEL_PATH, FeatureExtractor, SimilarityIndex
+    if not os.path.exists(FEATURES_MODEL_PATH):
+        return None
+    return FeatureExtractor(), SimilarityIndex()
+
+# --- CACHED INFERENCE (keyed on the uploaded bytes, so reruns and repeat uploads skip the model)
+@st.cache_data(show_spinner=False, max_entries=64)
+def diagnose_uploads(_engine, images):
+    from inference import diagnose
+    return diagnose(_engine, [io.BytesIO(image) for image in images])
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def embed_uploads(_extractor, images):
+    return _extractor.embed([io.BytesIO(image) for image in images])
+
+# --- CASE REVIEWERS (only they may add scans to the shared case library)
+# Set CASE_REVIEWER = true in the secrets (or the environment) of a reviewer's deployment
+CASE_REVIEWER = str(st.secrets.get("CASE_REVIEWER", os.environ.get("CASE_REVIEWER", ""))).lower() in ("1", "true", "yes")
 
 # --- GROQ RESPONSE GENERATOR
 def groq_generate(prompt):
     try:
-        response = groq_client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[
+        return complete(
+            [
                 {"role": "system", "content": "You are a professional medical assistant. Only answer relevant medical questions. Do not respond to unrelated queries."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            model="llama3-70b-8192",
+            api_key=os.environ["GROQ_API_KEY"]
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"Error: {e}"
 
 # --- STREAMLIT UI
+SERVICES = ["Image Diagnosis", "Patient History Summary", "Doctor Chatbot"]
 st.title("🧠 Smart Health Diagnosis AI Medical Assistant (Brain Tumor Detection + AI Doctor Chatbot)")
 st.sidebar.title("Menu")
-option = st.sidebar.radio("Choose a service", ["Image Diagnosis", "Patient History Summary", "Doctor Chatbot"])
+option = st.sidebar.radio("Choose a service", SERVICES, key="service")
 
 # --- IMAGE DIAGNOSIS
 if option == "Image Diagnosis":
     st.header("Upload Medical Image for Tumor Diagnosis")
-    uploaded_file = st.file_uploader("Upload X-ray, CT scan, or MRI", type=["jpg", "jpeg", "png"])
-    if uploaded_file:
-        img = Image.open(uploaded_file).convert("RGB").resize((224, 224))
-        st.image(img, caption="Uploaded Image", use_container_width=True)
-        img_array = np.array(img) / 255.0
-        img_array = np.expand_dims(img_array, axis=0)
-        with st.spinner("Analyzing image..."):
-            result = predict_image(cnn_model, img_array)
-            st.success(f"🧪 Diagnosis: **{result}**")
+    from inference import LABELS, MODEL_PATH
+    cnn_model = load_cnn_model()
+    uploaded_files = st.file_uploader(
+        "Upload X-ray, CT scan, or MRI", type=["jpg", "jpeg", "png"], accept_multiple_files=True
+    )
+    upload_bytes = tuple(f.getvalue() for f in uploaded_files or [])
+    if uploaded_files and cnn_model is None:
+        st.error(f"Model file not found at {MODEL_PATH}. Export it with export_model.py first.")
+    elif uploaded_files:
+        with st.spinner(f"Analyzing {len(uploaded_files)} image(s)..."):
+            results, elapsed = diagnose_uploads(cnn_model, upload_bytes)
+        st.caption(f"Analyzed {len(results)} image(s) in {elapsed * 1000:.0f} ms")
+        columns = st.columns(min(len(uploaded_files), 3))
+        for i, (uploaded_file, (label, probability)) in enumerate(zip(uploaded_files, results)):
+            with columns[i % len(columns)]:
+                st.image(uploaded_file, caption=uploaded_file.name, use_container_width=True)
+                st.success(f"🧪 Diagnosis: **{label}** ({probability:.0%} tumor probability)")
+
+    # --- SIMILAR REVIEWED CASES
+    library = load_case_library() if uploaded_files else None
+    if library:
+        extractor, case_index = library
+        embeddings = embed_uploads(extractor, upload_bytes)
+        if len(case_index):
+            st.subheader("🔎 Similar Reviewed Cases")
+            for uploaded_file, matches in zip(uploaded_files, case_index.search(embeddings, k=3)):
+                st.markdown(f"**{uploaded_file.name}**")
+                for column, (score, _, case) in zip(st.columns(3), matches):
+                    column.image(case["image"], use_container_width=True,
+                                 caption=f"{case['label']} (similarity {score:.2f})")
+                    if case.get("note"):
+                        column.caption(case["note"])
+
+        if CASE_REVIEWER:
+            with st.expander("➕ Add reviewed scans to the case library"):
+                labels = [
+                    st.selectbox(f"Confirmed finding for {f.name}", LABELS, key=f"case_label_{i}")
+                    for i, f in enumerate(uploaded_files)
+                ]
+                note = st.text_input("Reviewer note (optional)")
+                if st.button("Add to case library"):
+                    cases = [{"label": label, "note": note, "name": f.name} for f, label in zip(uploaded_files, labels)]
+                    added = case_index.add_images(uploaded_files, embeddings, cases)
+                    duplicates = len(cases) - len(added)
+                    st.success(f"Added {len(added)} case(s); the library now holds {len(case_index)}."
+                               + (f" {duplicates} scan(s) were already in the library." if duplicates else ""))
+    elif uploaded_files:
+        st.caption("Similar-case retrieval is off: export the feature model with export_model.py --features.")
 
 # --- PATIENT HISTORY
 elif option == "Patient History Summary":
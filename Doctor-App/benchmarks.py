@@ -0,0 +1,206 @@
+"""Benchmarks for the Doctor App.
+
+Run with ``python benchmarks.py <name> [options]``; each benchmark prints its timings.
+"""
+import argparse
+import ast
+import glob
+import importlib.util
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+# Runs the app headless on one page in a fresh interpreter: first run (cold), rerun (warm), peak RSS
+_STARTUP_PROBE = """
+import resource, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=600)
+at.secrets["GROQ_API_KEY"] = "benchmark"
+at.session_state["service"] = sys.argv[1]
+start = time.perf_counter()
+at.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+print(cold, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+# What every page paid before the vision stack was made page-scoped
+_LEGACY_PROBE = """
+import resource, time
+start = time.perf_counter()
+from benchmarks import legacy_keras_model
+legacy_keras_model(weights="imagenet")
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def app_services(path=APP_PATH):
+    """The sidebar pages, read from the SERVICES list in app.py (importing the app would run it)"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return next(ast.literal_eval(node.value) for node in tree.body if isinstance(node, ast.Assign)
+                and any(getattr(target, "id", None) == "SERVICES" for target in node.targets))
+
+
+def legacy_keras_model(weights=None):
+    """The graph the app used to build at startup: ResNet50 + Flatten -> Dense(128) -> Dense(1)"""
+    from tensorflow.keras.applications import ResNet50
+    from tensorflow.keras.layers import Dense, Flatten
+    from tensorflow.keras.models import Model
+
+    base_model = ResNet50(weights=weights, include_top=False, input_shape=(224, 224, 3))
+    x = Flatten()(base_model.output)
+    x = Dense(128, activation='relu')(x)
+    output = Dense(1, activation='sigmoid')(x)
+    return Model(inputs=base_model.input, outputs=output)
+
+
+def load_images(directory, count):
+    """Images from ``directory``, or random noise images when none is given"""
+    from PIL import Image
+
+    if directory:
+        paths = sorted(glob.glob(os.path.join(directory, "*.*")))[:count]
+        return [Image.open(path) for path in paths]
+    rng = np.random.default_rng(0)
+    return [Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8)) for _ in range(count)]
+
+
+def bench_inference(images=None, count=64, batch_sizes=(1, 8), keras_model=None, tflite_model=None, runs=3):
+    """Images/s and p95 batch latency of the Keras graph versus the exported TFLite model"""
+    from inference import MODEL_PATH, KerasEngine, TFLiteEngine, preprocess
+
+    pictures = load_images(images, count)
+    start = time.perf_counter()
+    batch = preprocess(pictures)
+    print(f"preprocess {len(pictures)} images: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    engines = {}
+    if importlib.util.find_spec("tensorflow"):
+        engines["keras"] = lambda: KerasEngine(keras_model or legacy_keras_model())
+    else:
+        print("Keras baseline skipped (needs tensorflow)")
+    tflite_model = tflite_model or MODEL_PATH
+    if os.path.exists(tflite_model):
+        engines["tflite"] = lambda: TFLiteEngine(tflite_model)
+    else:
+        print(f"{tflite_model} not found; run export_model.py first to compare against TFLite")
+
+    for name, build in engines.items():
+        engine = build().warmup()
+        for size in batch_sizes:
+            latencies = []
+            for _ in range(runs):
+                for offset in range(0, len(batch), size):
+                    chunk = batch[offset:offset + size]
+                    start = time.perf_counter()
+                    engine.predict(chunk, batch_size=size)
+                    latencies.append(time.perf_counter() - start)
+            throughput = runs * len(batch) / sum(latencies)
+            print(f"{name:7s} batch {size:3d}   {throughput:7.1f} images/s   "
+                  f"p95 batch latency {np.percentile(latencies, 95) * 1000:8.1f} ms")
+
+
+def bench_startup(runs=3):
+    """Per-page cold start (fresh process) and warm rerun time, plus peak memory"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for page in app_services():
+        cold, warm, rss = [], [], []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-c", _STARTUP_PROBE, page], cwd=here, capture_output=True, text=True, check=True
+            ).stdout.split()
+            cold.append(float(output[0]))
+            warm.append(float(output[1]))
+            rss.append(int(output[2]) / 1024)
+        print(f"{page:25s} cold {statistics.median(cold) * 1000:8.1f} ms   "
+              f"warm {statistics.median(warm) * 1000:7.1f} ms   peak RSS {max(rss):6.0f} MB")
+    result = subprocess.run([sys.executable, "-c", _LEGACY_PROBE], cwd=here, capture_output=True, text=True)
+    if result.returncode == 0:
+        seconds, peak = result.stdout.split()
+        print(f"{'Legacy eager ResNet50':25s} cold {float(seconds) * 1000:8.1f} ms   "
+              f"{'':21s}peak RSS {int(peak) / 1024:6.0f} MB")
+    else:
+        print("Legacy eager ResNet50 baseline skipped (needs tensorflow)")
+
+
+def bench_similarity(rows=100_000, queries=16, k=5, nprobe=8, clusters=None, spread=2.0):
+    """Similar-case query latency, exact vs IVF, and IVF recall@k on synthetic 2048-d embeddings.
+
+    Rows are drawn around 1000 centres with per-row noise ``spread`` times the
+    centre's scale (so rows of one centre are only loosely alike), and queries
+    are fresh draws that are not stored, like a new patient's scan.
+    """
+    from similarity_index import BLOCK_ROWS, FEATURE_DIM, SimilarityIndex
+
+    dim = FEATURE_DIM
+    directory = tempfile.mkdtemp()
+    # The quantizer is built explicitly below, not during the adds
+    index = SimilarityIndex(directory, dim, ivf_min_rows=rows + 1)
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((1000, dim), dtype=np.float32)
+
+    def sample(count):
+        noise = rng.standard_normal((count, dim), dtype=np.float32)
+        return centers[rng.integers(0, len(centers), count)] + spread * noise
+
+    start = time.perf_counter()
+    for offset in range(0, rows, BLOCK_ROWS):
+        count = min(BLOCK_ROWS, rows - offset)
+        index.add(sample(count), [{}] * count)
+    print(f"{rows} x {dim} float16 rows ({rows * dim * 2 / 1e6:.0f} MB) added in {time.perf_counter() - start:.1f} s")
+    # Held-out queries from the same distribution
+    query = sample(queries)
+
+    def timed(**kwargs):
+        index.search(query[:1], k, **kwargs)
+        start = time.perf_counter()
+        single = [index.search(q[None, :], k, **kwargs) for q in query]
+        single_ms = (time.perf_counter() - start) * 1000 / queries
+        start = time.perf_counter()
+        index.search(query, k, **kwargs)
+        return single_ms, (time.perf_counter() - start) * 1000, single
+
+    single_ms, batch_ms, exact = timed(exact=True)
+    print(f"exact   {single_ms:7.2f} ms/query   batch of {queries}: {batch_ms:7.1f} ms")
+    start = time.perf_counter()
+    index.build_ivf(clusters)
+    print(f"IVF with {len(index.centroids)} clusters built in {time.perf_counter() - start:.1f} s")
+    single_ms, batch_ms, approx = timed(nprobe=nprobe)
+    recall = np.mean([
+        len({r for _, r, _ in a[0]} & {r for _, r, _ in e[0]}) / k for a, e in zip(approx, exact)
+    ])
+    print(f"IVF     {single_ms:7.2f} ms/query   batch of {queries}: {batch_ms:7.1f} ms   "
+          f"nprobe {nprobe}   recall@{k} {recall:.2f}")
+    shutil.rmtree(directory)
+
+
+BENCHMARKS = {"inference": bench_inference, "startup": bench_startup, "similarity": bench_similarity}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("--images", help="directory of test images (default: random images)")
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[1, 8])
+    parser.add_argument("--keras-model", help="trained Keras model (default: the untrained legacy graph)")
+    parser.add_argument("--tflite-model", help="exported model (default: inference.MODEL_PATH)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=100_000, help="stored embeddings for the similarity benchmark")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--spread", type=float, default=2.0, help="noise relative to cluster centres")
+    args = parser.parse_args()
+    if args.name == "startup":
+        bench_startup(args.runs)
+    elif args.name == "similarity":
+        bench_similarity(args.rows, nprobe=args.nprobe, spread=args.spread)
+    else:
+        BENCHMARKS[args.name](args.images, args.count, args.batch_sizes, args.keras_model, args.tflite_model, args.runs)
@@ -0,0 +1,93 @@
+"""Export the trained tumor classifier to an int8 TFLite file for CPU inference.
+
+    python export_model.py tumor_classifier.keras --calibration calibration_images/  # needs tensorflow
+    python export_model.py --features   # ResNet50 embeddings for similar-case retrieval
+
+The Keras model must take (224, 224, 3) RGB images scaled to [0, 1] and end in
+a single sigmoid unit. Full-integer quantization is calibrated on the images
+in ``--calibration`` (a few hundred representative scans are enough), which
+are preprocessed exactly as the app preprocesses uploads.
+
+The feature model is the ImageNet ResNet50 backbone with average pooling and
+its own input preprocessing folded in, stored with float16 weights.
+"""
+import argparse
+import glob
+import os
+
+import numpy as np
+
+from inference import IMAGE_SIZE, MODEL_PATH, preprocess
+from similarity_index import FEATURES_MODEL_PATH
+
+CALIBRATION_SAMPLES = 200
+
+
+def calibration_batches(directory, limit=CALIBRATION_SAMPLES):
+    paths = sorted(
+        path for pattern in ("*.jpg", "*.jpeg", "*.png")
+        for path in glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+    )[:limit]
+    if not paths:
+        raise SystemExit(f"No calibration images found in {directory}")
+
+    def generate():
+        for path in paths:
+            yield [preprocess([path])]
+    return generate
+
+
+def export(keras_path, calibration, output=MODEL_PATH, int8_io=False):
+    """Convert with full-integer int8 weights and activations; returns the file size in bytes"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = calibration_batches(calibration)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    if int8_io:
+        # Smaller boundary copies; inference.TFLiteEngine quantizes inputs and dequantizes outputs itself
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    data = converter.convert()
+    with open(output, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def export_features(output=FEATURES_MODEL_PATH):
+    """Export the pooled ResNet50 feature extractor; takes [0, 1] RGB like the classifier"""
+    import tensorflow as tf
+
+    inputs = tf.keras.Input((IMAGE_SIZE, IMAGE_SIZE, 3))
+    x = tf.keras.applications.resnet50.preprocess_input(inputs * 255.0)
+    backbone = tf.keras.applications.ResNet50(weights="imagenet", include_top=False, pooling="avg")
+    model = tf.keras.Model(inputs, backbone(x))
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    data = converter.convert()
+    with open(output, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("keras_model", nargs="?", help="trained .keras / .h5 model")
+    parser.add_argument("--calibration", help="directory of representative images")
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--int8-io", action="store_true", help="also quantize the input and output tensors")
+    parser.add_argument("--features", action="store_true", help="also export the similar-case feature extractor")
+    args = parser.parse_args()
+    if not args.keras_model and not args.features:
+        parser.error("give a Keras model to export, --features, or both")
+    if args.keras_model:
+        if not args.calibration:
+            parser.error("--calibration is required to quantize the classifier")
+        size = export(args.keras_model, args.calibration, args.output, args.int8_io)
+        print(f"Wrote {args.output} ({size / 1e6:.1f} MB)")
+    if args.features:
+        size = export_features()
+        print(f"Wrote {FEATURES_MODEL_PATH} ({size / 1e6:.1f} MB)")
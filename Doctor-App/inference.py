@@ -0,0 +1,141 @@
+"""CPU inference for the tumor classifier.
+
+The trained Keras model is exported once with ``export_model.py`` to an int8
+TFLite file; the app only needs the small TFLite interpreter at run time.
+Images are preprocessed to float32 batches here, in the same way
+``export_model.py`` feeds its calibration images, so the quantization
+parameters match what the model sees in the app.
+"""
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+IMAGE_SIZE = 224
+BATCH_SIZE = 8
+THRESHOLD = 0.5
+LABELS = ("No Tumor Detected", "Tumor Detected")
+MODEL_PATH = os.environ.get(
+    "DOCTOR_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tumor_classifier_int8.tflite")
+)
+NUM_THREADS = int(os.environ.get("INFERENCE_THREADS", os.cpu_count() or 1))
+
+
+def preprocess(images, size=IMAGE_SIZE):
+    """PIL images or file-like uploads -> float32 batch of shape (N, size, size, 3) in [0, 1]"""
+    batch = np.empty((len(images), size, size, 3), dtype=np.float32)
+    for i, image in enumerate(images):
+        if not isinstance(image, Image.Image):
+            if hasattr(image, "seek"):
+                image.seek(0)
+            image = Image.open(image)
+        batch[i] = np.asarray(image.convert("RGB").resize((size, size)), dtype=np.float32)
+    batch *= 1 / 255.0
+    return batch
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class TFLiteEngine:
+    """Batched TFLite interpreter; int8 models are (de)quantized at the boundary.
+
+    Tensors are allocated once per input shape: one interpreter for single
+    images and one for full batches of ``batch_size``. Partial batches are
+    zero-padded to ``batch_size`` instead of reallocating the interpreter.
+    """
+
+    def __init__(self, path=MODEL_PATH, batch_size=BATCH_SIZE, num_threads=NUM_THREADS):
+        self.path = path
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self._interpreters = {}
+        _, self.input, self.output = self._interpreter(batch_size)
+
+    def _interpreter(self, size):
+        """(interpreter, input details, output details) allocated for batches of ``size``"""
+        if size not in self._interpreters:
+            interpreter = _interpreter_class()(model_path=self.path, num_threads=self.num_threads)
+            index = interpreter.get_input_details()[0]["index"]
+            interpreter.resize_tensor_input(index, [size, IMAGE_SIZE, IMAGE_SIZE, 3])
+            interpreter.allocate_tensors()
+            self._interpreters[size] = (
+                interpreter, interpreter.get_input_details()[0], interpreter.get_output_details()[0]
+            )
+        return self._interpreters[size]
+
+    def _run(self, batch):
+        count = len(batch)
+        size = count if count == 1 or count > self.batch_size else self.batch_size
+        if count < size:
+            batch = np.concatenate([batch, np.zeros((size - count,) + batch.shape[1:], dtype=batch.dtype)])
+        interpreter, input_details, output_details = self._interpreter(size)
+        scale, zero_point = input_details["quantization"]
+        if input_details["dtype"] != np.float32 and scale:
+            limits = np.iinfo(input_details["dtype"])
+            batch = np.clip(np.round(batch / scale + zero_point), limits.min, limits.max).astype(input_details["dtype"])
+        interpreter.set_tensor(input_details["index"], batch)
+        interpreter.invoke()
+        result = interpreter.get_tensor(output_details["index"])
+        scale, zero_point = output_details["quantization"]
+        if output_details["dtype"] != np.float32 and scale:
+            result = (result.astype(np.float32) - zero_point) * scale
+        return result.reshape(size, -1)[:count]
+
+    def outputs(self, batch, batch_size=BATCH_SIZE):
+        """Raw model outputs, one row per image of a preprocessed float32 batch"""
+        if not len(batch):
+            return np.empty((0, self.output["shape"][-1]), dtype=np.float32)
+        return np.concatenate([self._run(batch[start:start + batch_size])
+                               for start in range(0, len(batch), batch_size)])
+
+    def predict(self, batch, batch_size=BATCH_SIZE):
+        """Tumor probability for each image of a preprocessed float32 batch"""
+        return self.outputs(batch, batch_size)[:, -1]
+
+    def warmup(self, runs=2):
+        """Run dummy single images and full batches so the first real request does not pay for allocation"""
+        for size in sorted({1, self.batch_size}):
+            batch = np.zeros((size, IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32)
+            for _ in range(runs):
+                self._run(batch)
+        return self
+
+
+class KerasEngine:
+    """The same interface over a Keras model; used as the benchmark baseline"""
+
+    def __init__(self, model):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(model) if isinstance(model, str) else model
+
+    def predict(self, batch, batch_size=BATCH_SIZE):
+        return self.model.predict(batch, batch_size=batch_size, verbose=0).reshape(len(batch), -1)[:, -1]
+
+    def warmup(self, runs=2):
+        batch = np.zeros((BATCH_SIZE, IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32)
+        for _ in range(runs):
+            self.predict(batch)
+        return self
+
+
+def load_engine(path=MODEL_PATH):
+    """Open the exported model (.tflite) or a Keras model file and warm it up"""
+    if path.endswith(".tflite"):
+        return TFLiteEngine(path).warmup()
+    return KerasEngine(path).warmup()
+
+
+def diagnose(engine, images, threshold=THRESHOLD):
+    """Return [(label, probability)] for a list of images, plus the elapsed seconds"""
+    start = time.perf_counter()
+    probabilities = engine.predict(preprocess(images))
+    elapsed = time.perf_counter() - start
+    return [(LABELS[int(p >= threshold)], float(p)) for p in probabilities], elapsed
@@ -0,0 +1,312 @@
+"""Similar-case retrieval over reviewed scans.
+
+Each stored image is embedded once with an ImageNet ResNet50 whose last
+feature map is average-pooled (exported by ``export_model.py --features``).
+Embeddings are L2-normalized and kept in a float16 memory-mapped matrix, so
+cosine similarity is a plain dot product. Queries scan the matrix in blocks
+with batched NumPy. Past ``IVF_MIN_ROWS`` rows an IVF-style coarse quantizer
+is built automatically (k-means centroids over the embeddings; each query only
+scans the rows of its ``nprobe`` nearest clusters) and retrained whenever the
+collection has doubled since. It can also be built by hand::
+
+    python similarity_index.py build-ivf [--clusters N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+from PIL import Image
+
+from inference import NUM_THREADS, TFLiteEngine, preprocess
+
+INDEX_DIR = os.environ.get(
+    "CASE_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "case_index")
+)
+FEATURES_MODEL_PATH = os.environ.get(
+    "FEATURES_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "resnet50_features.tflite")
+)
+FEATURE_DIM = 2048
+INITIAL_CAPACITY = 1024
+# Rows converted from float16 and scored per step of an exact scan
+BLOCK_ROWS = 16_384
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50_000
+# Exact scans stay fast below this many rows; from here on adds keep an IVF quantizer trained
+IVF_MIN_ROWS = int(os.environ.get("CASE_INDEX_IVF_MIN_ROWS", 50_000))
+
+
+class FeatureExtractor:
+    """Pooled ResNet50 embeddings from the exported TFLite feature model"""
+
+    def __init__(self, path=FEATURES_MODEL_PATH, num_threads=NUM_THREADS):
+        self.engine = TFLiteEngine(path, num_threads=num_threads).warmup()
+
+    def embed(self, images):
+        """PIL images or uploads -> (N, FEATURE_DIM) float32"""
+        return self.engine.outputs(preprocess(images))
+
+
+def normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores, ids, k):
+    """Best k (scores, ids) per row of a (queries, candidates) score matrix, best first"""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(top, order, axis=1), ids[np.take_along_axis(part, order, axis=1)]
+
+
+def image_digest(image):
+    """SHA-256 of an upload's bytes (or a PIL image's pixels), used to skip scans already stored"""
+    if isinstance(image, Image.Image):
+        data = image.tobytes()
+    elif hasattr(image, "getvalue"):
+        data = image.getvalue()
+    else:
+        with open(image, "rb") as f:
+            data = f.read()
+    return hashlib.sha256(data).hexdigest()
+
+
+def kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Spherical k-means on normalized float32 vectors; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=clusters) == 0
+        # Re-seed empty clusters from random points so every list stays usable
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+    return centroids
+
+
+class SimilarityIndex:
+    """Append-only store of (embedding, case metadata) with top-k cosine search.
+
+    Files in ``directory``: ``features.f16`` (memory-mapped matrix),
+    ``cases.jsonl`` (one metadata record per row), ``meta.json`` and, once
+    built, ``ivf.npz`` (centroids, the cluster of every row and the row count
+    they were trained on).
+
+    Searches read a snapshot taken under the lock, so they can run while
+    another thread adds rows.
+    """
+
+    def __init__(self, directory=INDEX_DIR, dim=FEATURE_DIM, ivf_min_rows=IVF_MIN_ROWS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.ivf_min_rows = ivf_min_rows
+        self._lock = threading.Lock()
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        else:
+            meta = {"dim": dim, "count": 0, "capacity": 0}
+        self.dim, self.count, self.capacity = meta["dim"], meta["count"], meta["capacity"]
+        self.features = None
+        if self.capacity:
+            self.features = np.memmap(self._path("features.f16"), dtype=np.float16, mode="r+",
+                                      shape=(self.capacity, self.dim))
+        self.cases = []
+        if os.path.exists(self._path("cases.jsonl")):
+            with open(self._path("cases.jsonl"), encoding="utf-8") as f:
+                self.cases = [json.loads(line) for line in f][:self.count]
+        self.digests = {case["sha256"] for case in self.cases if case.get("sha256")}
+        self.centroids = self.assign = self._lists = None
+        self.trained_rows = 0
+        if os.path.exists(self._path("ivf.npz")):
+            with np.load(self._path("ivf.npz")) as ivf:
+                self.centroids, self.assign = ivf["centroids"], ivf["assign"]
+                self.trained_rows = int(ivf["trained_rows"]) if "trained_rows" in ivf else len(self.assign)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, needed):
+        capacity = max(INITIAL_CAPACITY, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self.features is not None:
+            self.features.flush()
+            del self.features
+        with open(self._path("features.f16"), "ab") as f:
+            f.truncate(capacity * self.dim * 2)
+        self.features = np.memmap(self._path("features.f16"), dtype=np.float16, mode="r+",
+                                  shape=(capacity, self.dim))
+        self.capacity = capacity
+
+    def _save_meta(self):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count, "capacity": self.capacity}, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _save_ivf(self):
+        np.savez(self._path("ivf.npz"), centroids=self.centroids, assign=self.assign,
+                 trained_rows=self.trained_rows)
+
+    def _needs_ivf(self):
+        if self.count < self.ivf_min_rows:
+            return False
+        return self.centroids is None or self.count >= 2 * self.trained_rows
+
+    def add(self, vectors, cases):
+        """Append embeddings with one metadata dict per row; returns the new row ids.
+
+        Builds (or retrains) the IVF quantizer when the collection has grown
+        past ``ivf_min_rows`` or doubled since it was trained.
+        """
+        vectors = normalize(vectors)
+        with self._lock:
+            start = self.count
+            self._grow(start + len(vectors))
+            self.features[start:start + len(vectors)] = vectors.astype(np.float16)
+            self.features.flush()
+            with open(self._path("cases.jsonl"), "a", encoding="utf-8") as f:
+                for case in cases:
+                    f.write(json.dumps(case) + "\n")
+            self.cases.extend(cases)
+            self.digests.update(case["sha256"] for case in cases if case.get("sha256"))
+            if self.centroids is not None:
+                self.assign = np.concatenate([self.assign, np.argmax(vectors @ self.centroids.T, axis=1)])
+                self._lists = None
+                self._save_ivf()
+            self.count += len(vectors)
+            self._save_meta()
+            rebuild = self._needs_ivf()
+        if rebuild:
+            self.build_ivf()
+        return list(range(start, start + len(vectors)))
+
+    def add_images(self, images, vectors, cases):
+        """Store reviewed images with their embeddings; a PNG copy of each is kept next to the index.
+
+        Images already in the library (same bytes) are skipped; returns the new row ids.
+        """
+        image_dir = self._path("images")
+        os.makedirs(image_dir, exist_ok=True)
+        stored, rows, seen = [], [], set()
+        for row, (image, case) in enumerate(zip(images, cases)):
+            digest = image_digest(image)
+            if digest in self.digests or digest in seen:
+                continue
+            seen.add(digest)
+            if hasattr(image, "seek"):
+                image.seek(0)
+            path = os.path.join(image_dir, f"{uuid.uuid4().hex}.png")
+            (image if isinstance(image, Image.Image) else Image.open(image)).convert("RGB").save(path)
+            stored.append(dict(case, image=path, sha256=digest))
+            rows.append(row)
+        if not stored:
+            return []
+        return self.add(np.asarray(vectors)[rows], stored)
+
+    def build_ivf(self, clusters=None, iterations=KMEANS_ITERATIONS, sample=KMEANS_SAMPLE):
+        """Train the coarse quantizer (default ~sqrt(n) clusters) and assign every row"""
+        with self._lock:
+            clusters = clusters or max(1, int(np.sqrt(self.count)))
+            rng = np.random.default_rng(0)
+            rows = np.sort(rng.choice(self.count, min(sample, self.count), replace=False))
+            centroids = kmeans(self.features[rows].astype(np.float32), clusters, iterations)
+            assign = np.empty(self.count, dtype=np.int32)
+            for start in range(0, self.count, BLOCK_ROWS):
+                block = self.features[start:min(start + BLOCK_ROWS, self.count)].astype(np.float32)
+                assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            self.centroids, self.assign, self._lists = centroids, assign, None
+            self.trained_rows = self.count
+            self._save_ivf()
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        return self._lists
+
+    def _search_exact(self, queries, k, features, count):
+        block_scores, block_ids = [], []
+        # One reused float32 buffer; the float16 -> float32 copy dominates the scan
+        buffer = np.empty((min(BLOCK_ROWS, count), self.dim), dtype=np.float32)
+        for start in range(0, count, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, count)
+            block = buffer[:stop - start]
+            np.copyto(block, features[start:stop])
+            scores = queries @ block.T
+            scores, ids = _top_k(scores, np.arange(start, stop), k)
+            block_scores.append(scores)
+            block_ids.append(ids)
+        # Merge the per-block winners; ids are already row numbers
+        scores = np.hstack(block_scores)
+        part, ids = _top_k(scores, np.arange(scores.shape[1]), k)
+        return part, np.take_along_axis(np.hstack(block_ids), ids, axis=1)
+
+    def _search_ivf(self, queries, k, nprobe, features, centroids, lists):
+        probes = np.argsort(-(queries @ centroids.T), axis=1)[:, :nprobe]
+        all_scores, all_ids = [], []
+        for query, clusters in zip(queries, probes):
+            ids = np.sort(np.concatenate([lists[c] for c in clusters]))
+            scores = features[ids].astype(np.float32) @ query
+            top_scores, top_ids = _top_k(scores[None, :], ids, k) if len(ids) else (
+                np.empty((1, 0), np.float32), np.empty((1, 0), np.int64))
+            all_scores.append(top_scores[0])
+            all_ids.append(top_ids[0])
+        return all_scores, all_ids
+
+    def search(self, vectors, k=5, nprobe=DEFAULT_NPROBE, exact=False):
+        """Top-k most similar stored cases for each query embedding.
+
+        Returns one list per query of ``(score, row, case)``; uses the IVF
+        quantizer when it has been built unless ``exact`` is set.
+        """
+        queries = normalize(vectors)
+        with self._lock:
+            count, features, cases = self.count, self.features, self.cases
+            use_ivf = self.centroids is not None and not exact
+            centroids, lists = (self.centroids, self._inverted_lists()) if use_ivf else (None, None)
+        if not count:
+            return [[] for _ in queries]
+        if use_ivf:
+            scores, ids = self._search_ivf(queries, k, nprobe, features, centroids, lists)
+        else:
+            scores, ids = self._search_exact(queries, k, features, count)
+        return [[(float(s), int(i), cases[i]) for s, i in zip(row_scores, row_ids)]
+                for row_scores, row_ids in zip(scores, ids)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the similar-case index")
+    parser.add_argument("command", choices=["build-ivf", "stats"])
+    parser.add_argument("--directory", default=INDEX_DIR)
+    parser.add_argument("--clusters", type=int, help="number of k-means clusters (default ~sqrt(rows))")
+    args = parser.parse_args()
+    index = SimilarityIndex(args.directory)
+    if args.command == "build-ivf":
+        if not len(index):
+            raise SystemExit(f"{args.directory} holds no cases yet")
+        index.build_ivf(args.clusters)
+        print(f"Built IVF with {len(index.centroids)} clusters over {len(index)} rows")
+    else:
+        clusters = len(index.centroids) if index.centroids is not None else 0
+        print(f"{len(index)} rows, {clusters} IVF clusters (trained on {index.trained_rows} rows)")
+
@@ -1,29 +1,29 @@
 import requests
 from datetime import datetime, timedelta
 import pandas as pd
-from groq import Groq
 from config import GROQ_API_KEY
 
+from common.llm_gateway import complete
+
 def get_groq_summary(prompt, context=""):
     """Enhanced Groq LLM function with context and better error handling"""
     if not GROQ_API_KEY:
         return "API key not configured"
     try:
-        client = Groq(api_key=GROQ_API_KEY)
         full_prompt = f"{context}\n\n{prompt}" if context else prompt
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
+        return complete(
+            [
                 {"role": "system", "content": "You are an expert seismologist, emergency response specialist, and public safety advisor. Provide detailed, accurate, and actionable information."},
                 {"role": "user", "content": full_prompt}
             ],
+            model="llama-3.3-70b-versatile",
+            api_key=GROQ_API_KEY,
             max_tokens=2048,
             temperature=0.7,
             top_p=0.9,
             presence_penalty=0.1,
             frequency_penalty=0.1
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"AI Analysis Error: {str(e)}"
 
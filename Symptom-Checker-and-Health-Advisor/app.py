@@ -1,49 +1,62 @@
 import streamlit as st
 import os
-import speech_recognition as sr
-from gtts import gTTS
-import tempfile
 
-# Placeholder for Groq API initialization
-try:
-    from groq import Groq
-    # Set the API key securely
-    os.environ["GROQ_API_KEY"] = ""
-    client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-except ImportError:
-    st.error("The `groq` library is not installed or available. Please install it.")
+# Shared modules (LLM gateway, audio I/O) come from the repository's common package;
+# the Groq client is created once per process on first use
+from common.llm_gateway import complete
+from common.audio_io import text_to_mp3
+from semantic_cache import session_cache
+from triage import emergency_response, extract_symptoms, red_flag_caution, structured_summary
+from asr_backends import BACKENDS, DEFAULT_BACKEND, transcribe
+
+# Set the API key securely
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
 
 # Function to process text input
-def analyze_symptoms(symptoms):
-    if not client:
-        return "Groq API client is not initialized."
+def analyze_symptoms(symptoms, use_cache=True):
+    # Local triage first: red flags get an immediate escalation without waiting for the LLM
+    triage = extract_symptoms(symptoms)
+    emergency = emergency_response(triage)
+    if emergency:
+        return emergency
+    # Red flags the user said are absent get a caution above the analysis instead
+    caution = red_flag_caution(triage)
+    response = _llm_analysis(triage, symptoms, use_cache)
+    return f"{caution}\n\n{response}" if caution else response
+
+def _llm_analysis(triage, symptoms, use_cache):
+    if not GROQ_API_KEY:
+        return "Groq API key is not configured."
+    # The model (and the cache key) get the compact symptom list and patient context
+    summary = structured_summary(triage, symptoms)
     try:
-        chat_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": f"Analyze these symptoms and suggest possible causes: {symptoms}"}],
+        # Reuse the analysis of an earlier, similarly worded description from this session
+        cache = session_cache(st.session_state) if use_cache else None
+        cached = cache.lookup(summary) if cache else None
+        if cached:
+            return cached[0]
+        response = complete(
+            f"Analyze these symptoms and suggest possible causes: {summary}",
             model="llama3-8b-8192",
+            api_key=GROQ_API_KEY,
         )
-        return chat_completion.choices[0].message.content
+        if cache:
+            cache.add(summary, response)
+        return response
     except Exception as e:
         return f"Error analyzing symptoms: {e}"
 
 # Function for voice input handling
-def transcribe_audio(audio_file):
-    recognizer = sr.Recognizer()
+def transcribe_audio(audio_file, backend=DEFAULT_BACKEND):
     try:
-        with sr.AudioFile(audio_file) as source:
-            audio_data = recognizer.record(source)
-        return recognizer.recognize_google(audio_data)
-    except sr.UnknownValueError:
-        return "Sorry, could not understand the audio."
+        text = transcribe(audio_file, backend)
     except Exception as e:
         return f"Error transcribing audio: {e}"
+    return text or "Sorry, could not understand the audio."
 
-# Function to convert text to speech
+# Function to convert text to speech (MP3 bytes, synthesized in memory)
 def text_to_speech(text):
-    tts = gTTS(text)
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-    tts.save(temp_file.name)
-    return temp_file.name
+    return text_to_mp3(text)
 
 # Streamlit UI
 def app():
@@ -67,10 +80,22 @@ def app():
                 st.warning("Please enter symptoms.")
 
     elif input_mode == "Voice":
+        backend = st.selectbox(
+            "Speech recognition engine",
+            list(BACKENDS),
+            index=list(BACKENDS).index(DEFAULT_BACKEND),
+            help="google needs internet access; vosk and whisper run locally on the CPU."
+        )
         uploaded_file = st.file_uploader("Upload an audio file with your symptoms (e.g., WAV format):")
         if uploaded_file is not None:
             st.audio(uploaded_file)
-            transcribed_text = transcribe_audio(uploaded_file)
+            # Transcribe each upload once; reruns (e.g. pressing Analyze) reuse the text
+            transcripts = st.session_state.setdefault("transcripts", {})
+            key = (getattr(uploaded_file, "file_id", uploaded_file.name), backend)
+            if key not in transcripts:
+                with st.spinner("Transcribing audio..."):
+                    transcripts[key] = transcribe_audio(uploaded_file, backend)
+            transcribed_text = transcripts[key]
             st.subheader("Transcribed Symptoms")
             st.write(transcribed_text)
             if st.button("Analyze Symptoms"):
@@ -85,8 +110,8 @@ def app():
     # Text-to-Speech Output
     if st.button("Hear the AI's Advice"):
         advice = "Make sure to take the provided suggestions seriously and consult a healthcare professional if needed."
-        audio_file = text_to_speech(advice)
-        st.audio(audio_file)
+        audio_bytes = text_to_speech(advice)
+        st.audio(audio_bytes, format="audio/mp3")
 
 if __name__ == "__main__":
     app()
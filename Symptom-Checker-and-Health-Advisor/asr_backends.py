@@ -0,0 +1,108 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+from common.audio_io import SPEECH_RATE as SAMPLE_RATE, decode, to_pcm16
+
+# Long uploads are transcribed in windows of about this length
+CHUNK_SECONDS = 30
+# Each cut is moved to the quietest 20 ms frame in the last SEARCH_SECONDS of the window
+SEARCH_SECONDS = 2
+FRAME_SECONDS = 0.02
+DEFAULT_BACKEND = os.environ.get("ASR_BACKEND", "google")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+# An unpacked Vosk model; if the directory is missing, vosk downloads the model of
+# the same name (about 40 MB) into ~/.cache/vosk on first use
+VOSK_MODEL_PATH = os.environ.get(
+    "VOSK_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vosk-model-small-en-us-0.15")
+)
+
+
+def split_chunks(samples, chunk_seconds=CHUNK_SECONDS):
+    """Split audio into ~chunk_seconds windows, cutting at low-energy frames to avoid splitting words"""
+    size = int(chunk_seconds * SAMPLE_RATE)
+    search = int(SEARCH_SECONDS * SAMPLE_RATE)
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    chunks = []
+    start = 0
+    while len(samples) - start > size:
+        window = samples[start + size - search:start + size]
+        energy = np.square(window[:len(window) // frame * frame]).reshape(-1, frame).sum(axis=1)
+        cut = start + size - search + int(energy.argmin()) * frame
+        chunks.append(samples[start:cut])
+        start = cut
+    chunks.append(samples[start:])
+    return chunks
+
+
+class GoogleBackend:
+    """Google Web Speech API through SpeechRecognition (needs network access)"""
+
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+
+    def transcribe_chunk(self, samples):
+        audio = self.sr.AudioData(to_pcm16(samples), SAMPLE_RATE, 2)
+        try:
+            return self.recognizer.recognize_google(audio)
+        except self.sr.UnknownValueError:
+            return ""
+
+
+class VoskBackend:
+    """Offline Kaldi models through Vosk; VOSK_MODEL_PATH points at an unpacked model.
+
+    Models are listed at https://alphacephei.com/vosk/models; when the path does
+    not exist the model named by its last component is downloaded once and cached.
+    """
+
+    name = "vosk"
+
+    def __init__(self):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        if os.path.isdir(VOSK_MODEL_PATH):
+            self.model = Model(VOSK_MODEL_PATH)
+        else:
+            self.model = Model(model_name=os.path.basename(VOSK_MODEL_PATH.rstrip("/\\")))
+
+    def transcribe_chunk(self, samples):
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, SAMPLE_RATE)
+        recognizer.AcceptWaveform(to_pcm16(samples))
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+class WhisperBackend:
+    """Offline OpenAI Whisper on CPU; WHISPER_MODEL selects the size (tiny, base, small, ...)"""
+
+    name = "whisper"
+
+    def __init__(self):
+        import whisper
+        self.model = whisper.load_model(WHISPER_MODEL, device="cpu")
+
+    def transcribe_chunk(self, samples):
+        return self.model.transcribe(samples, fp16=False)["text"].strip()
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend, VoskBackend, WhisperBackend)}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=DEFAULT_BACKEND):
+    """Load a backend (and its model) once per process"""
+    return BACKENDS[name]()
+
+
+def transcribe(audio_file, backend=DEFAULT_BACKEND, chunk_seconds=CHUNK_SECONDS):
+    """Transcribe an upload (WAV, or any format ffmpeg reads) chunk by chunk and join the pieces"""
+    engine = get_backend(backend)
+    pieces = [engine.transcribe_chunk(chunk) for chunk in split_chunks(decode(audio_file), chunk_seconds)]
+    return " ".join(piece for piece in pieces if piece)
@@ -0,0 +1,102 @@
+"""Benchmarks for the Symptom Checker.
+
+Run with ``python benchmarks.py <name> [args]``; each benchmark prints its timings.
+"""
+import argparse
+import glob
+import os
+import statistics
+import subprocess
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asr_fixtures")
+# Reference transcripts of the committed fixtures; --regenerate re-synthesizes them with espeak-ng
+FIXTURE_TRANSCRIPTS = {
+    "sore_throat": "I have had a sore throat and a mild fever for three days",
+    "chest_pain": "my chest hurts when I breathe deeply and I feel short of breath",
+    "abdominal_pain": "sharp pain in my lower right abdomen since last night",
+    "dizziness": "I feel dizzy and sick every morning after breakfast",
+}
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length"""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (ref_word != hyp_word))
+    return row[-1] / max(len(ref), 1)
+
+
+def write_fixtures(directory=FIXTURES_DIR):
+    """Synthesize FIXTURE_TRANSCRIPTS to 16 kHz mono WAVs with .txt references.
+
+    Uses the offline espeak-ng synthesizer, so the clips are the same on every
+    machine; its robotic voice makes WER an upper bound on real speech.
+    """
+    from common.audio_io import decode, encode_wav
+
+    os.makedirs(directory, exist_ok=True)
+    for name, text in FIXTURE_TRANSCRIPTS.items():
+        speech = subprocess.run(
+            ["espeak-ng", "-v", "en-us", "-s", "150", "--stdout", text], capture_output=True, check=True
+        ).stdout
+        with open(os.path.join(directory, f"{name}.wav"), "wb") as f:
+            f.write(encode_wav(decode(speech)))
+        with open(os.path.join(directory, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+def bench_asr(fixtures=FIXTURES_DIR, backends=None):
+    """Latency, real-time factor and WER per ASR backend over a directory of WAV fixtures.
+
+    A ``clip.txt`` next to ``clip.wav`` is used as the reference transcript.
+    """
+    from asr_backends import BACKENDS, SAMPLE_RATE, decode, get_backend, transcribe
+
+    paths = sorted(glob.glob(os.path.join(fixtures, "*.wav")))
+    if not paths:
+        print(f"No .wav fixtures in {fixtures}")
+        return
+    durations = {path: len(decode(path)) / SAMPLE_RATE for path in paths}
+    for name in backends or list(BACKENDS):
+        start = time.perf_counter()
+        try:
+            get_backend(name)
+        except Exception as e:
+            print(f"{name:8s} unavailable: {e}")
+            continue
+        load = time.perf_counter() - start
+        latencies, factors, errors = [], [], []
+        for path in paths:
+            start = time.perf_counter()
+            text = transcribe(path, name)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            factors.append(elapsed / durations[path])
+            reference = os.path.splitext(path)[0] + ".txt"
+            if os.path.exists(reference):
+                with open(reference, encoding="utf-8") as f:
+                    errors.append(word_error_rate(f.read(), text))
+        wer = f"{statistics.mean(errors):.1%}" if errors else "n/a"
+        print(f"{name:8s} load {load:6.2f} s   median {statistics.median(latencies):6.2f} s   "
+              f"max {max(latencies):6.2f} s   real-time factor {statistics.median(factors):5.2f}   WER {wer}")
+
+
+BENCHMARKS = {"asr": bench_asr}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted(BENCHMARKS))
+    parser.add_argument("fixtures", nargs="?", default=FIXTURES_DIR,
+                        help="directory of WAV files with optional .txt references (default: asr_fixtures/)")
+    parser.add_argument("--backends", nargs="*", help="backends to compare (default: all)")
+    parser.add_argument("--regenerate", action="store_true", help="re-synthesize the default fixtures first")
+    args = parser.parse_args()
+    if args.regenerate:
+        write_fixtures(args.fixtures)
+    BENCHMARKS[args.name](args.fixtures, args.backends)
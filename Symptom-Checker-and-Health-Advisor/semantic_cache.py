@@ -0,0 +1,225 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 32
+MAX_ENTRIES = 2_000
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# Cosine similarity above which a past analysis is reused
+SIMILARITY_THRESHOLD = 0.90
+# A persisted cache is written at most this often (and once more at exit), not on every add
+SAVE_INTERVAL_SECONDS = 30
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Words that flip or scale the meaning of a description; two descriptions only
+# share an analysis if they agree on all of these, however similar they embed
+_GUARD_WORDS = {
+    "no", "not", "without", "never", "none", "denies", "dont", "don", "t", "longer",
+    "left", "right", "both", "pregnant", "pregnancy",
+    "head", "chest", "arm", "arms", "leg", "legs", "knee", "knees", "back", "neck", "throat", "stomach",
+    "abdomen", "belly", "eye", "eyes", "ear", "ears", "foot", "feet", "hand", "hands", "jaw", "face", "skin",
+    "minute", "minutes", "hour", "hours", "day", "days", "week", "weeks", "month", "months", "year", "years",
+}
+_NUMBER_WORDS = {"a", "an", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"}
+
+
+def normalize_text(text):
+    """Lowercase and keep only words, so punctuation and spacing do not matter"""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def guard_terms(query):
+    """Negations, sides, body sites, pregnancy, numbers and time units of a normalized query"""
+    return sorted(w for w in query.split() if w in _GUARD_WORDS or w in _NUMBER_WORDS or w.isdigit())
+
+
+class MiniLMEmbedder:
+    """all-MiniLM-L6-v2 from sentence-transformers, run on CPU"""
+
+    name = "minilm"
+
+    def __init__(self):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+
+    def encode(self, texts):
+        return self.model.encode(
+            texts, batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Load the embedding model once per process; None if sentence-transformers is unavailable"""
+    try:
+        return MiniLMEmbedder()
+    except Exception:
+        return None
+
+
+def embed(texts, embedder):
+    """Embed normalized texts in batches of EMBED_BATCH_SIZE; returns unit-length rows"""
+    batches = [embedder.encode(texts[i:i + EMBED_BATCH_SIZE]) for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+
+class SemanticCache:
+    """Reuse past analyses for symptom descriptions that mean the same thing.
+
+    With the MiniLM model, a stored analysis is reused when its query embeds
+    within ``threshold`` cosine similarity *and* has the same guard terms
+    (negations, sides, body sites, pregnancy, numbers, time units). Without
+    the model only exact normalized matches are reused. Query embeddings live
+    in one float32 matrix, so a lookup is a single matrix-vector product.
+
+    ``prefix=None`` keeps the cache in memory only; otherwise it is saved as
+    ``<prefix>.npz`` (vectors) plus ``<prefix>.json`` (queries, responses,
+    timestamps), at most every SAVE_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, prefix=None, embedder=None, threshold=SIMILARITY_THRESHOLD,
+                 max_entries=MAX_ENTRIES, max_age=MAX_AGE_SECONDS):
+        self.prefix = prefix
+        self.embedder = embedder if embedder is not None else get_embedder()
+        self.name = self.embedder.name if self.embedder else "exact"
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.entries = []
+        self.vectors = None
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        if prefix:
+            self._load()
+            atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            with open(f"{self.prefix}.json", encoding="utf-8") as f:
+                saved = json.load(f)
+            vectors = np.load(f"{self.prefix}.npz")["vectors"]
+        except (OSError, ValueError, KeyError):
+            return
+        self.entries = saved["entries"]
+        if not self.embedder:
+            self.vectors = None
+        elif saved.get("embedder") == self.name and len(vectors) == len(self.entries):
+            self.vectors = vectors
+        elif self.entries:
+            # Saved with a different embedding model; re-embed the stored queries in batches
+            self.vectors = embed([e["query"] for e in self.entries], self.embedder)
+        self._evict(time.time())
+
+    def save(self):
+        """Write the index atomically so a crash never leaves half a file"""
+        if not self.prefix:
+            return
+        with self._save_lock:
+            with self._lock:
+                vectors = self.vectors if self.vectors is not None else np.empty((0, 0), dtype=np.float32)
+                entries = [dict(e) for e in self.entries]
+                self._dirty = False
+                self._saved_at = time.time()
+            np.savez(f"{self.prefix}.tmp.npz", vectors=vectors)
+            with open(f"{self.prefix}.tmp.json", "w", encoding="utf-8") as f:
+                json.dump({"embedder": self.name, "entries": entries}, f)
+            os.replace(f"{self.prefix}.tmp.npz", f"{self.prefix}.npz")
+            os.replace(f"{self.prefix}.tmp.json", f"{self.prefix}.json")
+
+    def flush(self):
+        """Save pending additions now"""
+        if self._dirty:
+            self.save()
+
+    def _evict(self, now):
+        """Drop entries older than max_age, then the least recently used beyond max_entries"""
+        keep = [i for i, e in enumerate(self.entries) if now - e["created"] < self.max_age]
+        if len(keep) > self.max_entries:
+            keep = sorted(keep, key=lambda i: self.entries[i]["accessed"])[-self.max_entries:]
+            keep.sort()
+        if len(keep) < len(self.entries):
+            self.entries = [self.entries[i] for i in keep]
+            if self.vectors is not None:
+                self.vectors = self.vectors[keep] if keep else None
+
+    def _match(self, row, query, scores):
+        """Index of the entry to reuse for ``query`` or None"""
+        exact = next((i for i, e in enumerate(self.entries) if e["query"] == query), None)
+        if exact is not None or scores is None:
+            return exact
+        guard = guard_terms(query)
+        for index in np.argsort(-scores[row])[:5]:
+            if scores[row, index] < self.threshold:
+                break
+            if guard_terms(self.entries[index]["query"]) == guard:
+                return int(index)
+        return None
+
+    def lookup_many(self, texts):
+        """Return a (response, similarity) pair or None for each text, embedding them in one batch"""
+        queries = [normalize_text(text) for text in texts]
+        found = [None] * len(queries)
+        vectors = embed(queries, self.embedder) if self.embedder else None
+        now = time.time()
+        with self._lock:
+            if self.entries:
+                scores = vectors @ self.vectors.T if vectors is not None and self.vectors is not None else None
+                for row, query in enumerate(queries):
+                    index = self._match(row, query, scores)
+                    if index is None:
+                        continue
+                    entry = self.entries[index]
+                    if now - entry["created"] < self.max_age:
+                        entry["accessed"] = now
+                        found[row] = (entry["response"], 1.0 if scores is None else float(scores[row, index]))
+            hits = sum(result is not None for result in found)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(found) - hits
+        return found
+
+    def lookup(self, text):
+        return self.lookup_many([text])[0]
+
+    def add_many(self, pairs):
+        """Store (query text, response) pairs, embedding the queries in one batch"""
+        if not pairs:
+            return
+        queries = [normalize_text(text) for text, _ in pairs]
+        vectors = embed(queries, self.embedder) if self.embedder else None
+        now = time.time()
+        with self._lock:
+            self.entries.extend(
+                {"query": query, "response": response, "created": now, "accessed": now}
+                for query, (_, response) in zip(queries, pairs)
+            )
+            if vectors is not None:
+                self.vectors = vectors if self.vectors is None else np.vstack([self.vectors, vectors])
+            self._evict(now)
+            self._dirty = True
+            due = now - self._saved_at >= SAVE_INTERVAL_SECONDS
+        if due:
+            self.save()
+
+    def add(self, text, response):
+        self.add_many([(text, response)])
+
+
+def session_cache(state):
+    """The calling user's own cache, kept in memory in their session state.
+
+    Descriptions are health data, so analyses are never shared between users
+    or written to disk by the app.
+    """
+    if "semantic_cache" not in state:
+        state["semantic_cache"] = SemanticCache()
+    return state["semantic_cache"]
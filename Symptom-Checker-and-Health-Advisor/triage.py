@@ -0,0 +1,212 @@
+import csv
+import os
+import re
+from collections import deque
+from functools import lru_cache
+
+VOCABULARY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symptom_vocabulary.csv")
+# Words that negate a symptom mentioned within the next NEGATION_WINDOW words ("no fever")
+NEGATIONS = {"no", "not", "without", "denies", "never", "none", "dont", "don't"}
+NEGATION_PHRASES = ("no longer",)
+NEGATION_WINDOW = 3
+# A negation never reaches past punctuation or one of these words ("no fever but chest pain")
+CLAUSE_WORDS = {"but", "and", "since", "however", "though", "although", "except", "yet"}
+CLAUSE_BREAK = "|"
+# Characters scanned back from a match for negations; keeps extraction linear in the text length
+NEGATION_CHARS = 60
+
+EMERGENCY_MESSAGE = (
+    "⚠️ Your description mentions {flags}, which can be a sign of a medical emergency. "
+    "Please call your local emergency number (e.g. 911 or 112) or go to the nearest emergency "
+    "department now. Do not wait for an online assessment."
+)
+CAUTION_MESSAGE = (
+    "ℹ️ You mentioned no {flags}. If that changes, or you are unsure, call your local "
+    "emergency number (e.g. 911 or 112) right away."
+)
+# Patient context the symptom vocabulary does not cover; sent to the model alongside the symptom list
+SEXES = {"male": "male", "man": "male", "boy": "male", "female": "female", "woman": "female", "girl": "female"}
+CONDITIONS = (
+    "diabetes", "asthma", "hypertension", "high blood pressure", "heart disease", "heart failure", "copd",
+    "cancer", "hiv", "kidney disease", "liver disease", "epilepsy", "stroke", "heart attack",
+    "high cholesterol", "thyroid", "depression", "anxiety", "arthritis", "allergies", "migraines",
+)
+HISTORY_WORDS = 5
+
+_CLAUSE_PUNCTUATION = re.compile(r"[,.;:!?()\n]+")
+_NON_WORD = re.compile(r"[^a-z0-9'|]+")
+_DURATION = re.compile(
+    r"\b(?:for|since|over)\s+(?:the\s+)?(?:past\s+|last\s+)?"
+    r"((?:\d+|a|an|one|two|three|four|five|six|seven|few|several|couple of)\s+"
+    r"(?:minutes?|hours?|days?|weeks?|months?|years?)|yesterday|last night|this morning)\b"
+)
+
+
+_AGE = re.compile(
+    r"\b(\d{1,3})\s*(?:years?|yrs?|yo|y o)(?:\s+old)?\b|\bage(?:d)?\s+(\d{1,3})\b|\bi(?:'m| m| am)\s+(\d{1,3})\b"
+)
+_PREGNANT = re.compile(r"\b(?:(\d{1,2})\s+weeks?\s+)?pregnant\b")
+_HISTORY = re.compile(r"\b(?:history of|diagnosed with|suffer from|suffering from|taking|on medication for)\s+([a-z0-9' ]+)")
+_CONDITIONS = re.compile(r"\b(" + "|".join(re.escape(c) for c in CONDITIONS) + r")\b")
+
+
+def normalize(text):
+    """Lowercase, keep word characters and pad with spaces so matches fall on word boundaries.
+
+    Clause punctuation becomes a ``|`` token, which stops both phrase matches
+    and the reach of a negation.
+    """
+    text = _CLAUSE_PUNCTUATION.sub(f" {CLAUSE_BREAK} ", text.lower())
+    return f" {_NON_WORD.sub(' ', text).strip()} "
+
+
+def _is_negated(normalized, start):
+    """True if a negation precedes ``start`` within the same clause"""
+    words = normalized[max(0, start - NEGATION_CHARS):start].split()
+    for i in range(len(words) - 1, -1, -1):
+        if words[i] == CLAUSE_BREAK or words[i] in CLAUSE_WORDS:
+            words = words[i + 1:]
+            break
+    scope = words[-NEGATION_WINDOW:]
+    return bool(NEGATIONS.intersection(scope)) or any(p in " ".join(scope) for p in NEGATION_PHRASES)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every vocabulary phrase in one pass over the text"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for value, pattern in patterns:
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append((len(pattern), value))
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Yield (start, end, value) for every pattern occurrence"""
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                yield end - length, end, value
+
+
+@lru_cache(maxsize=1)
+def get_matcher(path=VOCABULARY_FILE):
+    """Build the matcher over the bundled vocabulary once per process"""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return AhoCorasick(((row["symptom"], row["red_flag"] == "1"), normalize(row["phrase"])) for row in rows)
+
+
+def extract_symptoms(text):
+    """Return symptoms, negated symptoms, red flags and patient context found in free text.
+
+    ``red_flags`` holds only red flags that are present; red flags mentioned as
+    absent ("no chest pain") go to ``negated_red_flags`` so they can be shown
+    as a caution instead of an escalation.
+    """
+    normalized = normalize(text)
+    found, negated, red_flags, negated_flags = [], [], [], []
+    for start, _, (symptom, red_flag) in get_matcher().find(normalized):
+        if _is_negated(normalized, start):
+            if symptom not in negated:
+                negated.append(symptom)
+            if red_flag and symptom not in negated_flags:
+                negated_flags.append(symptom)
+            continue
+        if symptom not in found:
+            found.append(symptom)
+        if red_flag and symptom not in red_flags:
+            red_flags.append(symptom)
+    duration = _DURATION.search(normalized)
+    return {
+        "symptoms": found,
+        "negated": [s for s in negated if s not in found],
+        "red_flags": red_flags,
+        "negated_red_flags": [s for s in negated_flags if s not in red_flags],
+        "duration": duration.group(1) if duration else None,
+        "context": patient_context(normalized),
+    }
+
+
+def patient_context(normalized):
+    """Age, sex, pregnancy and medical history stated in normalized text, as short phrases"""
+    context = []
+    age = _AGE.search(normalized)
+    if age:
+        context.append(f"age {next(group for group in age.groups() if group)}")
+    sex = next((SEXES[word] for word in normalized.split() if word in SEXES), None)
+    if sex:
+        context.append(sex)
+    pregnant = _PREGNANT.search(normalized)
+    if pregnant and not _is_negated(normalized, pregnant.start()):
+        context.append(f"pregnant ({pregnant.group(1)} weeks)" if pregnant.group(1) else "pregnant")
+    history = []
+    for match in _HISTORY.finditer(normalized):
+        if not _is_negated(normalized, match.start()):
+            words = match.group(1).split()[:HISTORY_WORDS]
+            clause_end = next((i for i, word in enumerate(words) if word in CLAUSE_WORDS), len(words))
+            if clause_end:
+                history.append(" ".join(words[:clause_end]))
+    for match in _CONDITIONS.finditer(normalized):
+        if not _is_negated(normalized, match.start()) and not any(match.group(1) in h for h in history):
+            history.append(match.group(1))
+    if history:
+        context.append(f"history: {', '.join(dict.fromkeys(history))}")
+    return context
+
+
+def emergency_response(triage):
+    """Canned escalation for red-flag symptoms that are present, or None"""
+    if not triage["red_flags"]:
+        return None
+    return EMERGENCY_MESSAGE.format(flags=", ".join(triage["red_flags"]))
+
+
+def red_flag_caution(triage):
+    """A note to show above the analysis when red flags were mentioned as absent, or None"""
+    if not triage["negated_red_flags"]:
+        return None
+    return CAUTION_MESSAGE.format(flags=", ".join(triage["negated_red_flags"]))
+
+
+def structured_summary(triage, text):
+    """A compact symptom list plus the patient context the vocabulary cannot capture.
+
+    Only when no symptom is recognized is the user's own description sent instead.
+    """
+    facts = []
+    if triage["symptoms"]:
+        facts.append(f"Symptoms: {', '.join(triage['symptoms'])}.")
+    if triage["duration"]:
+        facts.append(f"Duration: {triage['duration']}.")
+    if triage["negated"]:
+        facts.append(f"Denies: {', '.join(triage['negated'])}.")
+    if triage["context"]:
+        facts.append(f"Patient: {'; '.join(triage['context'])}.")
+    if not triage["symptoms"]:
+        return text.strip()
+    return " ".join(facts)
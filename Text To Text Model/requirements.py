@@ -1,24 +1,22 @@
-# Set Groq API Key
-os.environ["GROQ_API_KEY"] = ""
-import os
-from groq import Groq
 import streamlit as st
 
-# Initialize Groq client
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+# Shared LLM gateway; reads GROQ_API_KEY and reuses one Groq client across reruns
+from common.llm_gateway import complete
+from response_cache import cache_key, get_response_cache
 
 # Function to generate response using Groq
-def chat_with_llm(user_message, model="llama3-8b-8192"):
+def chat_with_llm(user_message, model="llama3-8b-8192", bypass_cache=False):
+    messages = [
+        {"role": "user", "content": user_message},
+    ]
     try:
-        # Send message to Groq LLM
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "user", "content": user_message},
-            ],
-            model=model,
+        # Answer from the response cache when this prompt was already sent to this model,
+        # otherwise send the message to the Groq LLM and cache its response
+        return get_response_cache().get_or_compute(
+            cache_key(model, messages),
+            lambda: complete(messages, model=model),
+            bypass=bypass_cache,
         )
-        # Return the LLM's response
-        return chat_completion.choices[0].message.content
     except Exception as e:
         return f"Error: {e}"
 
@@ -29,13 +27,20 @@ def main():
 
     # Input text from the user
     user_input = st.text_input("You:", "")
+    fresh_answer = st.checkbox("Always ask the model (skip cached answers)")
 
     # Display bot's response
     if st.button("Send"):
         if user_input.strip():
             with st.spinner("Thinking..."):
-                bot_response = chat_with_llm(user_input)
+                bot_response = chat_with_llm(user_input, bypass_cache=fresh_answer)
             st.text_area("Bot:", bot_response, height=150)
 
+    cache = get_response_cache()
+    st.caption(
+        f"Response cache: {cache.hit_rate():.0%} hit rate "
+        f"({cache.stats['memory_hits']} memory, {cache.stats['disk_hits']} disk, {cache.stats['misses']} misses)"
+    )
+
 if __name__ == "__main__":
     main()
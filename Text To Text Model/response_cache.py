@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+CACHE_PATH = os.environ.get(
+    "RESPONSE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "response_cache.sqlite3")
+)
+MEMORY_ENTRIES = 256
+TTL_SECONDS = 24 * 60 * 60
+# Upper bound on the total size of cached responses kept on disk
+MAX_DISK_BYTES = 50 * 1024 * 1024
+
+
+def normalize_messages(messages):
+    """Collapse whitespace so trivially different prompts share a cache entry"""
+    return [{"role": m["role"], "content": " ".join(str(m["content"]).split())} for m in messages]
+
+
+def cache_key(model, messages, **params):
+    """SHA-256 of (model, normalized messages, sampling params)"""
+    payload = {"model": model, "messages": normalize_messages(messages), "params": params}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier exact-match cache: an in-process LRU in front of a SQLite file.
+
+    Disk entries expire after ``ttl`` seconds; once the file holds more than
+    ``max_bytes`` of responses the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, memory_entries=MEMORY_ENTRIES, ttl=TTL_SECONDS, max_bytes=MAX_DISK_BYTES):
+        self.memory = OrderedDict()
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT, created REAL, accessed REAL, size INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def _remember(self, key, response, created):
+        self.memory[key] = (response, created)
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached response or None"""
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, response, now, now, len(response.encode()))
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def get_or_compute(self, key, compute, bypass=False):
+        """Return a cached response, or call ``compute()`` and cache its result.
+
+        ``bypass`` skips the lookup and the store, for sampled (temperature > 0)
+        requests where every call should produce a fresh answer.
+        """
+        if bypass:
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return compute()
+        response = self.get(key)
+        if response is None:
+            response = compute()
+            self.put(key, response)
+        return response
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+
+@lru_cache(maxsize=1)
+def get_response_cache():
+    """One cache per process, shared by every Streamlit session"""
+    return ResponseCache()
@@ -1,34 +1,27 @@
 # Import libraries
 import whisper
-import os
-from gtts import gTTS
 import gradio as gr
-from groq import Groq
+
+from common.llm_gateway import complete
+from common.audio_io import decode, from_gradio, text_to_mp3, to_gradio
 
 # Load Whisper model for transcription
 model = whisper.load_model("base")
 
-# Set up Groq API client (ensure GROQ_API_KEY is set in your environment)
-client = Groq(api_key=os.environ.get(" "))
-
 # Function to get the LLM response from Groq
 def get_llm_response(user_input):
-    chat_completion = client.chat.completions.create(
-        messages=[{"role": "user", "content": user_input}],
-        model="llama3-8b-8192",  # Replace with your desired model
-    )
-    return chat_completion.choices[0].message.content
-
-# Function to convert text to speech using gTTS
-def text_to_speech(text, output_audio="output_audio.mp3"):
-    tts = gTTS(text)
-    tts.save(output_audio)
-    return output_audio
+    # Uses the shared Groq client (ensure GROQ_API_KEY is set in your environment)
+    return complete(user_input, model="llama3-8b-8192")  # Replace with your desired model
+
+# Function to convert text to speech using gTTS, entirely in memory so
+# concurrent users never share (or overwrite) an output file
+def text_to_speech(text):
+    return to_gradio(decode(text_to_mp3(text), rate=24_000), rate=24_000)
 
 # Main chatbot function to handle audio input and output
 def chatbot(audio):
-    # Step 1: Transcribe the audio using Whisper
-    result = model.transcribe(audio)
+    # Step 1: Transcribe the audio using Whisper (16 kHz float32 samples, no temp file)
+    result = model.transcribe(from_gradio(audio), fp16=False)
     user_text = result["text"]
 
     # Step 2: Get LLM response from Groq
@@ -42,8 +35,8 @@ def chatbot(audio):
 # Gradio interface for real-time interaction
 iface = gr.Interface(
     fn=chatbot,
-    inputs=gr.Audio(type="filepath"),  # Input from mic or file
-    outputs=[gr.Textbox(), gr.Audio(type="filepath")],  # Output: response text and audio
+    inputs=gr.Audio(type="numpy"),  # Input from mic or file, as (sample_rate, samples)
+    outputs=[gr.Textbox(), gr.Audio(type="numpy")],  # Output: response text and audio
     live=True
 )
 
@@ -0,0 +1,106 @@
+"""In-memory audio decoding, resampling and encoding shared by the voice apps.
+
+Everything works on ``bytes``/``BytesIO`` and NumPy arrays, so requests never
+write temporary files and concurrent sessions cannot clobber each other's
+audio. Samples are mono float32 in [-1, 1] unless noted otherwise.
+"""
+import io
+import subprocess
+import wave
+
+import numpy as np
+
+SPEECH_RATE = 16_000
+
+
+def _read_bytes(source):
+    """Accept bytes, a file-like object (e.g. a Streamlit upload) or a path"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def _from_pcm(frames, width, channels):
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    else:
+        dtype = {2: np.int16, 4: np.int32}[width]
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+    return samples.reshape(-1, channels).mean(axis=1)
+
+
+def resample(samples, rate, target_rate):
+    """Linear-interpolation resampling; adequate for speech recognition input"""
+    if rate == target_rate or not len(samples):
+        return samples.astype(np.float32, copy=False)
+    positions = np.arange(0, len(samples), rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode(source, rate=SPEECH_RATE):
+    """Decode audio to mono float32 at ``rate``.
+
+    PCM WAV is parsed with the standard library; anything else (mp3, m4a, ogg, ...)
+    is piped through ffmpeg's stdin/stdout, which also does the resampling.
+    """
+    data = _read_bytes(source)
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wav:
+            samples = _from_pcm(wav.readframes(wav.getnframes()), wav.getsampwidth(), wav.getnchannels())
+            return resample(samples, wav.getframerate(), rate)
+    except (wave.Error, EOFError, KeyError):
+        pass
+    result = subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(rate), "pipe:1"],
+        input=data, capture_output=True, check=True
+    )
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32767
+
+
+def to_pcm16(samples):
+    """float32 samples -> little-endian 16-bit PCM bytes"""
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def encode_wav(samples, rate=SPEECH_RATE):
+    """Encode mono float32 samples as WAV bytes"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(to_pcm16(samples))
+    return buffer.getvalue()
+
+
+def from_gradio(audio, rate=SPEECH_RATE):
+    """Convert Gradio ``type="numpy"`` audio, a (sample_rate, int array) tuple, to float32 at ``rate``"""
+    sample_rate, data = audio
+    data = np.asarray(data)
+    if np.issubdtype(data.dtype, np.integer):
+        samples = data.astype(np.float32) / np.iinfo(data.dtype).max
+    else:
+        samples = data.astype(np.float32)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    return resample(samples, sample_rate, rate)
+
+
+def to_gradio(samples, rate=SPEECH_RATE):
+    """float32 samples -> the (sample_rate, int16 array) tuple Gradio plays back"""
+    return rate, (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def text_to_mp3(text, lang="en"):
+    """Synthesize speech with gTTS straight into memory and return the MP3 bytes"""
+    from gtts import gTTS
+    buffer = io.BytesIO()
+    gTTS(text, lang=lang).write_to_fp(buffer)
+    return buffer.getvalue()
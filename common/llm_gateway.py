@@ -0,0 +1,174 @@
+"""Process-wide LLM gateway shared by the apps in this repository.
+
+One keep-alive HTTP client is created per (provider, API key) and reused for
+every request, so connection and TLS setup happen once per process instead
+of once per call or per Streamlit rerun.
+
+Requests go through a ``Scheduler`` per (provider, API key, model) (see
+``llm_scheduler``) that enforces that model's request/token rate limits,
+retries 429s, 5xx and connection failures, and coalesces identical concurrent
+prompts.
+
+The ``common`` package is installed with the apps' requirements (``-e ..``,
+or ``pip install -e .`` at the repository root), so apps simply import::
+
+    from common.llm_gateway import complete, stream
+"""
+import hashlib
+import json
+import os
+import threading
+from common.llm_scheduler import (
+    INTERACTIVE, NORMAL, BACKGROUND, RateLimitedError, Scheduler, UpstreamError, estimate_tokens
+)
+
+DEFAULT_MODEL = "llama3-70b-8192"
+REQUEST_TIMEOUT = 60.0
+MAX_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 120.0
+
+# Provider settings; ``base_url_env`` lets a local stub stand in for the real API.
+# Rate limits are per model and default to Groq's free tier; raise them for paid accounts.
+PROVIDERS = {
+    "groq": {
+        "api_key_env": "GROQ_API_KEY",
+        "base_url_env": "GROQ_BASE_URL",
+        "requests_per_minute": int(os.environ.get("GROQ_RPM", 30)),
+        "tokens_per_minute": int(os.environ.get("GROQ_TPM", 6_000)),
+    },
+}
+
+# Model name used by the apps -> provider, upstream model id and default parameters
+MODEL_REGISTRY = {
+    "llama3-70b-8192": {"provider": "groq", "model": "llama3-70b-8192", "params": {}},
+    "llama3-8b-8192": {"provider": "groq", "model": "llama3-8b-8192", "params": {}},
+    "llama-3.3-70b-versatile": {"provider": "groq", "model": "llama-3.3-70b-versatile", "params": {}},
+}
+
+_clients = {}
+_schedulers = {}
+_clients_lock = threading.Lock()
+
+
+def register_model(name, model=None, provider="groq", **params):
+    """Add or override a registry entry, e.g. to point an old model name at a newer one"""
+    MODEL_REGISTRY[name] = {"provider": provider, "model": model or name, "params": params}
+
+
+def _load_overrides():
+    """Apply ``LLM_MODEL_OVERRIDES="alias=model,alias2=model2"`` from the environment"""
+    for pair in filter(None, os.environ.get("LLM_MODEL_OVERRIDES", "").split(",")):
+        alias, _, model = pair.partition("=")
+        if model:
+            entry = MODEL_REGISTRY.get(alias.strip(), {"provider": "groq", "params": {}})
+            register_model(alias.strip(), model.strip(), entry["provider"], **entry["params"])
+
+
+_load_overrides()
+
+
+def resolve_model(name):
+    """Registry entry for ``name``; unknown names pass straight through to Groq"""
+    return MODEL_REGISTRY.get(name, {"provider": "groq", "model": name, "params": {}})
+
+
+def get_client(provider="groq", api_key=None):
+    """Return the shared SDK client for a provider, creating it on first use"""
+    settings = PROVIDERS[provider]
+    api_key = api_key or os.environ.get(settings["api_key_env"])
+    key = (provider, api_key)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    with _clients_lock:
+        if key not in _clients:
+            import httpx
+            from groq import Groq
+            http_client = httpx.Client(
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+            )
+            # Retries are owned by the scheduler so they respect the shared rate limits
+            _clients[key] = Groq(
+                api_key=api_key,
+                base_url=os.environ.get(settings["base_url_env"]) or None,
+                http_client=http_client,
+                max_retries=0,
+            )
+        return _clients[key]
+
+
+def get_scheduler(provider="groq", api_key=None, model=None):
+    """Return the rate-limit scheduler shared by every caller of one model on one provider account"""
+    settings = PROVIDERS[provider]
+    key = (provider, api_key or os.environ.get(settings["api_key_env"]), model)
+    with _clients_lock:
+        if key not in _schedulers:
+            _schedulers[key] = Scheduler(settings["requests_per_minute"], settings["tokens_per_minute"])
+        return _schedulers[key]
+
+
+def request_key(request):
+    """Stable hash of a request, used to coalesce identical in-flight prompts"""
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _prepare(messages, model, params):
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    entry = resolve_model(model)
+    return entry, {"model": entry["model"], "messages": messages, **entry["params"], **params}
+
+
+def _usage(response):
+    """Total tokens reported by a completion or final stream chunk, if any"""
+    usage = getattr(response, "usage", None) or getattr(getattr(response, "x_groq", None), "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+def complete(messages, model=DEFAULT_MODEL, api_key=None, priority=NORMAL, **params):
+    """Return the full text of a chat completion.
+
+    ``messages`` is a list of chat messages or a single user prompt string;
+    extra keyword arguments (temperature, max_tokens, ...) go to the API.
+    Raises ``RateLimitedError`` if the provider is still throttling after retries
+    (or the request waited too long in the queue) and ``UpstreamError`` for
+    other persistent server or connection failures.
+    """
+    entry, request = _prepare(messages, model, params)
+    client = get_client(entry["provider"], api_key)
+    response = get_scheduler(entry["provider"], api_key, entry["model"]).run(
+        lambda: client.chat.completions.create(**request),
+        tokens=estimate_tokens(request["messages"], request),
+        priority=priority,
+        key=request_key(request),
+        usage=_usage,
+    )
+    return response.choices[0].message.content
+
+
+def stream(messages, model=DEFAULT_MODEL, api_key=None, priority=INTERACTIVE, **params):
+    """Yield the text deltas of a streamed chat completion.
+
+    Streams are rate limited and retried until the first response arrives but
+    are never coalesced, since each caller consumes its own stream.
+    """
+    entry, request = _prepare(messages, model, params)
+    client = get_client(entry["provider"], api_key)
+    scheduler = get_scheduler(entry["provider"], api_key, entry["model"])
+    tokens = estimate_tokens(request["messages"], request)
+    chunks = scheduler.run(
+        lambda: client.chat.completions.create(stream=True, **request),
+        tokens=tokens,
+        priority=priority,
+    )
+    for chunk in chunks:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
+        # Groq reports the stream's usage on its last chunk
+        scheduler.settle(tokens, _usage(chunk))
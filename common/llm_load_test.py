@@ -0,0 +1,177 @@
+"""Drive the apps' LLM functions at N concurrent users and report latency percentiles.
+
+The apps are Streamlit/Gradio scripts that do UI work at import time, so the
+target functions are lifted out of their source with ``ast`` and executed
+against a small namespace holding only what they reference. Run from the
+repository root::
+
+    python -m common.llm_load_test --users 20 --requests 10            # embedded stub
+    python -m common.llm_load_test --base-url http://127.0.0.1:8000 symptoms
+"""
+import argparse
+import ast
+import importlib.util
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# String prefixes the apps return instead of raising
+ERROR_PREFIXES = ("Error", "AI Analysis Error", "API key not configured", "Groq API key is not configured")
+
+
+def load_function(path, name, namespace):
+    """Compile a single top-level function from a script without running the script"""
+    with open(os.path.join(REPO_ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    node = next(n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == name)
+    module = ast.Module(body=[node], type_ignores=[])
+    exec(compile(module, path, "exec"), namespace)
+    return namespace[name]
+
+
+def load_module(path, name):
+    """Import a helper module that lives next to an app script"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(REPO_ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _groq_namespace():
+    from common.llm_gateway import complete
+    return {"os": os, "complete": complete, "GROQ_API_KEY": os.environ["GROQ_API_KEY"]}
+
+
+def _response_cache_namespace():
+    # Keep load-test entries out of the app's real cache file
+    os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "response_cache.sqlite3"))
+    cache = load_module("Text To Text Model/response_cache.py", "response_cache")
+    return {"cache_key": cache.cache_key, "get_response_cache": cache.get_response_cache}
+
+
+def _triage_namespace():
+    triage = load_module("Symptom-Checker-and-Health-Advisor/triage.py", "triage")
+    return {name: getattr(triage, name) for name in ("emergency_response", "extract_symptoms",
+                                                   "red_flag_caution", "structured_summary")}
+
+
+def _ollama_target(base_url):
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_ollama import ChatOllama
+    namespace = {
+        "llm_engine": ChatOllama(model="deepseek-r1:1.5b", base_url=base_url, temperature=0.3),
+        "StrOutputParser": StrOutputParser,
+    }
+    fn = load_function("Deep-Seek-Model/app.py", "generate_ai_response", namespace)
+    return lambda prompt: fn(ChatPromptTemplate.from_messages([("human", prompt)]))
+
+
+def _groq_target(path, name, extra=dict, helpers=(), **kwargs):
+    """``helpers`` are other functions of the same script that ``name`` calls"""
+    def build(base_url):
+        namespace = {**_groq_namespace(), **extra()}
+        for helper in helpers:
+            load_function(path, helper, namespace)
+        fn = load_function(path, name, namespace)
+        return lambda prompt: fn(prompt, **kwargs)
+    return build
+
+
+# Target name -> builder(base_url) returning a callable(prompt)
+TARGETS = {
+    "text-to-text": _groq_target("Text To Text Model/requirements.py", "chat_with_llm", _response_cache_namespace),
+    "symptoms": _groq_target("Symptom-Checker-and-Health-Advisor/app.py", "analyze_symptoms", _triage_namespace,
+                             helpers=("_llm_analysis",), use_cache=False),
+    "doctor": _groq_target("Doctor-App/app.py", "groq_generate"),
+    "quakeguard": _groq_target("QuakeGuard AI/api_utils.py", "get_groq_summary"),
+    "deepseek": _ollama_target,
+}
+
+PROMPTS = [
+    "I have a headache and mild fever since yesterday",
+    "Summarize recent seismic activity near the Pacific coast",
+    "How often should I irrigate maize in sandy soil?",
+    "Explain the difference between a cold and the flu",
+]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_load(fn, users, requests_per_user, think_time=0.0):
+    """Run ``users`` concurrent loops of ``requests_per_user`` calls; return latencies, errors and wall time"""
+    def user(user_id):
+        latencies, errors = [], 0
+        for i in range(requests_per_user):
+            # Unique prompts so the gateway does not coalesce the load away
+            prompt = f"{PROMPTS[(user_id + i) % len(PROMPTS)]} (user {user_id}, request {i})"
+            start = time.perf_counter()
+            try:
+                result = fn(prompt)
+                failed = isinstance(result, str) and result.startswith(ERROR_PREFIXES)
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            errors += failed
+            if think_time:
+                time.sleep(think_time)
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        results = list(pool.map(user, range(users)))
+    wall = time.perf_counter() - start
+    latencies = sorted(t for user_latencies, _ in results for t in user_latencies)
+    return latencies, sum(errors for _, errors in results), wall
+
+
+def report(name, latencies, errors, wall):
+    print(
+        f"{name:14s} n={len(latencies):5d}  errors={errors:4d}  "
+        f"p50={percentile(latencies, 50) * 1000:8.1f} ms  p95={percentile(latencies, 95) * 1000:8.1f} ms  "
+        f"p99={percentile(latencies, 99) * 1000:8.1f} ms  throughput={len(latencies) / wall:7.2f} req/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=sorted(TARGETS), help=f"any of {', '.join(sorted(TARGETS))}")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=5, help="requests per user")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--base-url", help="running stub or real endpoint; default starts an embedded stub")
+    parser.add_argument("--ttft", default="lognormal:-1.6,0.4", help="embedded stub latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        from common.llm_stub_server import StubConfig, serve_in_thread
+        _, base_url = serve_in_thread(StubConfig(args.ttft, args.tokens_per_second, error_rate=args.error_rate))
+    # Must be set before the gateway is imported; the stub is not rate limited unless asked to be
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "stub")
+    os.environ.setdefault("GROQ_RPM", "100000")
+    os.environ.setdefault("GROQ_TPM", "100000000")
+
+    print(f"Endpoint {base_url}: {args.users} users x {args.requests} requests")
+    for name in args.targets:
+        try:
+            fn = TARGETS[name](base_url)
+        except ImportError as e:
+            print(f"{name:14s} skipped ({e.name} is not installed)")
+            continue
+        report(name, *run_load(fn, args.users, args.requests, args.think_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Client-side rate limiting, prioritisation and coalescing for LLM calls.
+
+Every upstream request passes through a ``Scheduler`` which
+
+* waits for a requests-per-minute and a tokens-per-minute token bucket,
+* admits waiting requests in priority order (``INTERACTIVE`` before ``BACKGROUND``),
+  giving up with ``RateLimitedError`` once a request has waited ``max_wait`` seconds,
+* retries 429/5xx responses and connection failures with exponential backoff,
+  honouring ``Retry-After``,
+* charges the token bucket with the observed usage once a response arrives,
+* lets concurrent callers with the same key share one in-flight upstream call.
+
+Callers run in their own thread; there is no worker pool.
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Completion tokens reserved up front; the difference to the real usage is settled afterwards
+DEFAULT_COMPLETION_TOKENS = 512
+# Longest a request may wait for admission (queue, buckets and backoff) before giving up
+MAX_WAIT_SECONDS = float(os.environ.get("LLM_MAX_WAIT", 45))
+
+
+class UpstreamError(RuntimeError):
+    """Raised when the provider keeps failing a request after all retries"""
+
+
+class RateLimitedError(UpstreamError):
+    """Raised when the provider keeps rate limiting a request, or it waited too long to be admitted"""
+
+
+class TokenBucket:
+    """Continuously refilling bucket; not thread-safe on its own (the scheduler locks it)"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until ``amount`` can be taken (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def give(self, amount):
+        """Return (or, if negative, charge extra) tokens after the real cost is known"""
+        self.level = min(self.capacity, self.level + amount)
+
+
+def estimate_tokens(messages, params):
+    """Rough prompt + completion token count reserved from the TPM bucket before a call"""
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 4 + min(params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS, DEFAULT_COMPLETION_TOKENS)
+
+
+def _status(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def _is_connection_error(error):
+    """Transport failures (SDK connection/timeout errors, OS-level socket errors)"""
+    return isinstance(error, (ConnectionError, TimeoutError)) or type(error).__name__ in (
+        "APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "ConnectTimeout"
+    )
+
+
+def _failure(error, attempts):
+    """An error worded by what actually went wrong"""
+    status = _status(error)
+    if status == 429:
+        return RateLimitedError("The AI service is busy right now (rate limited). Please try again in a minute.")
+    if status:
+        return UpstreamError(f"The AI service is having problems (HTTP {status}) after {attempts} attempts. "
+                             "Please try again shortly.")
+    return UpstreamError(f"Could not reach the AI service ({type(error).__name__}) after {attempts} attempts. "
+                         "Check the connection and try again.")
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header on the error's response, if present"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Admission control for one provider account and model (the provider's limits are per model)"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=MAX_RETRIES, max_wait=MAX_WAIT_SECONDS):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._inflight = {}
+        self.stats = {"requests": 0, "upstream": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "timeouts": 0}
+
+    def _give_up(self, ticket):
+        """Leave the queue after the deadline passed (caller holds the lock)"""
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self.stats["timeouts"] += 1
+        self._cond.notify_all()
+        return RateLimitedError(
+            f"The AI service is at its request limit; this request waited more than {self.max_wait:.0f} s. "
+            "Please try again in a minute."
+        )
+
+    def _admit(self, tokens, priority, deadline):
+        """Block until this request is first in line and both buckets allow it.
+
+        Raises ``RateLimitedError`` instead of waiting past ``deadline``.
+        """
+        ticket = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                now = time.monotonic()
+                if self._queue[0] == ticket:
+                    wait = max(
+                        self.requests.wait_time(1, now),
+                        self.tokens.wait_time(tokens, now),
+                        self.paused_until - now,
+                    )
+                    if wait <= 0:
+                        self.requests.take(1)
+                        self.tokens.take(tokens)
+                        heapq.heappop(self._queue)
+                        self._cond.notify_all()
+                        return
+                    if now + wait > deadline:
+                        raise self._give_up(ticket)
+                    self._cond.wait(wait)
+                elif now >= deadline:
+                    raise self._give_up(ticket)
+                else:
+                    self._cond.wait(deadline - now)
+
+    def settle(self, reserved, used):
+        """Charge the observed token usage instead of the up-front reservation"""
+        if used is None:
+            return
+        with self._cond:
+            self.tokens.give(reserved - used)
+            self._cond.notify_all()
+
+    def _backoff(self, error, attempt):
+        """Pause admissions after a rejected request and return the delay"""
+        delay = _retry_after(error)
+        if delay is None:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random() / 2)
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.stats["retries"] += 1
+            if _status(error) == 429:
+                self.stats["rate_limited"] += 1
+        return delay
+
+    def _execute(self, call, tokens, priority, usage):
+        deadline = time.monotonic() + self.max_wait
+        for attempt in range(self.max_retries + 1):
+            self._admit(tokens, priority, deadline)
+            with self._cond:
+                self.stats["upstream"] += 1
+            try:
+                result = call()
+            except Exception as error:
+                if _status(error) not in RETRY_STATUSES and not _is_connection_error(error):
+                    raise
+                if attempt == self.max_retries:
+                    raise _failure(error, attempt + 1) from error
+                if time.monotonic() + self._backoff(error, attempt) > deadline:
+                    raise _failure(error, attempt + 1) from error
+                continue
+            if usage is not None:
+                self.settle(tokens, usage(result))
+            return result
+
+    def run(self, call, tokens=1, priority=NORMAL, key=None, usage=None):
+        """Run ``call()`` under the rate limits; callers sharing ``key`` share one result.
+
+        ``usage(result)`` may return the tokens the call really consumed, which
+        replaces the ``tokens`` reserved for it in the TPM bucket.
+        """
+        with self._cond:
+            self.stats["requests"] += 1
+            shared = self._inflight.get(key) if key is not None else None
+            if shared is None and key is not None:
+                owned = self._inflight[key] = Future()
+            else:
+                owned = None
+            if shared is not None:
+                self.stats["coalesced"] += 1
+        if shared is not None:
+            return shared.result()
+        try:
+            result = self._execute(call, tokens, priority, usage)
+        except BaseException as error:
+            if owned is not None:
+                owned.set_exception(error)
+            raise
+        else:
+            if owned is not None:
+                owned.set_result(result)
+            return result
+        finally:
+            if owned is not None:
+                with self._cond:
+                    del self._inflight[key]
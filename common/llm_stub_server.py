@@ -0,0 +1,220 @@
+"""Local stand-in for the LLM APIs used by the apps, for offline load testing.
+
+Serves OpenAI-style chat completions (Groq's ``/openai/v1`` prefix and plain
+``/v1``), including SSE streaming, and Ollama's ``/api/chat``. Latency, token
+rate, errors and rate limits are configurable::
+
+    python -m common.llm_stub_server --port 8000 --ttft lognormal:-1.5,0.5 --tokens-per-second 80
+    GROQ_BASE_URL=http://127.0.0.1:8000 streamlit run "Text To Text Model/requirements.py"
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "the crop needs steady water and balanced nutrients while symptoms suggest rest fluids "
+    "and a visit to a doctor if the pain persists seismic activity remains moderate"
+).split()
+
+
+def parse_distribution(spec):
+    """Build a sampler from ``fixed:s``, ``uniform:a,b``, ``normal:mu,sigma`` or ``lognormal:mu,sigma``"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    samplers = {
+        "fixed": lambda: values[0],
+        "uniform": lambda: random.uniform(values[0], values[1]),
+        "normal": lambda: max(0.0, random.gauss(values[0], values[1])),
+        "lognormal": lambda: random.lognormvariate(values[0], values[1]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    return samplers[kind]
+
+
+class StubConfig:
+    """Behaviour knobs shared by all handler threads"""
+
+    def __init__(self, ttft="fixed:0.2", tokens_per_second=50.0, response_tokens=60,
+                 error_rate=0.0, error_status=500, requests_per_minute=0, window_seconds=60.0):
+        self.ttft = parse_distribution(ttft)
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests_per_minute = requests_per_minute
+        # Length of the rate-limit window; shorter than a minute only to keep tests fast
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.window = []
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def admit(self):
+        """Return a Retry-After in seconds if this request exceeds the RPM limit, else None"""
+        with self.lock:
+            self.stats["requests"] += 1
+            if not self.requests_per_minute:
+                return None
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < self.window_seconds]
+            if len(self.window) >= self.requests_per_minute:
+                self.stats["rate_limited"] += 1
+                return self.window_seconds - (now - self.window[0])
+            self.window.append(now)
+            return None
+
+    def answer_tokens(self):
+        return [random.choice(WORDS) + " " for _ in range(self.response_tokens)]
+
+
+def _completion(model, text, tokens):
+    return {
+        "id": f"stub-{random.getrandbits(32):x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+def _chunk(model, delta, finish_reason=None):
+    return {
+        "id": "stub-stream",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        config = self.config
+        retry_after = config.admit()
+        if retry_after is not None:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                            {"Retry-After": f"{retry_after:.2f}"})
+            return
+        if random.random() < config.error_rate:
+            with config.lock:
+                config.stats["errors"] += 1
+            self._send_json(config.error_status, {"error": {"message": "Injected stub error"}})
+            return
+
+        time.sleep(config.ttft())
+        tokens = config.answer_tokens()
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            self._openai(body, tokens)
+        elif self.path.rstrip("/") == "/api/chat":
+            self._ollama(body, tokens)
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def _openai(self, body, tokens):
+        model = body.get("model", "stub")
+        if not body.get("stream"):
+            time.sleep(len(tokens) / self.config.tokens_per_second)
+            self._send_json(200, _completion(model, "".join(tokens), len(tokens)))
+            return
+        self._start_stream("text/event-stream")
+        self._write_chunk(f"data: {json.dumps(_chunk(model, {'role': 'assistant', 'content': ''}))}\n\n")
+        for token in tokens:
+            time.sleep(1 / self.config.tokens_per_second)
+            self._write_chunk(f"data: {json.dumps(_chunk(model, {'content': token}))}\n\n")
+        self._write_chunk(f"data: {json.dumps(_chunk(model, {}, 'stop'))}\n\ndata: [DONE]\n\n")
+        self._end_stream()
+
+    def _ollama(self, body, tokens):
+        model = body.get("model", "stub")
+        message = lambda text: {"role": "assistant", "content": text}
+        if not body.get("stream", True):
+            time.sleep(len(tokens) / self.config.tokens_per_second)
+            self._send_json(200, {"model": model, "message": message("".join(tokens)), "done": True,
+                                  "done_reason": "stop", "eval_count": len(tokens)})
+            return
+        self._start_stream("application/x-ndjson")
+        for token in tokens:
+            time.sleep(1 / self.config.tokens_per_second)
+            self._write_chunk(json.dumps({"model": model, "message": message(token), "done": False}) + "\n")
+        self._write_chunk(json.dumps({"model": model, "message": message(""), "done": True,
+                                      "done_reason": "stop", "eval_count": len(tokens)}) + "\n")
+        self._end_stream()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 refuses connections when many load-test users start at once
+    request_queue_size = 256
+
+
+def make_server(config, host="127.0.0.1", port=0):
+    """Create (but do not start) a stub server; port 0 picks a free port"""
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    return StubServer((host, port), handler)
+
+
+def serve_in_thread(config, host="127.0.0.1", port=0):
+    """Start a stub server on a daemon thread and return (server, base_url)"""
+    server = make_server(config, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--ttft", default="fixed:0.2", help="time-to-first-token distribution (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--response-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before answering 429 (0 = unlimited)")
+    args = parser.parse_args()
+    config = StubConfig(args.ttft, args.tokens_per_second, args.response_tokens,
+                        args.error_rate, args.error_status, args.rpm)
+    server = make_server(config, args.host, args.port)
+    print(f"LLM stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(config.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import io
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AI Farming Assistant App"))
+
+from csv_utils import analyze_csv, infer_dtypes  # noqa: E402
+
+
+def _csv(rows=20):
+    lines = ["crop,field,yield"] + [f"{('maize', 'rice')[i % 2]},plot-{i},{i}" for i in range(rows)]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+# pandas 3 still matches its str dtype under "object" but warns that this fallback is going away
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_low_cardinality_text_column_is_read_as_category():
+    head = pd.read_csv(_csv())
+    assert infer_dtypes(head) == {"crop": "category"}
+    assert analyze_csv(_csv())["dtypes"]["crop"] == "category"
@@ -0,0 +1,106 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from common import llm_gateway
+from common.llm_scheduler import BACKGROUND, INTERACTIVE, RateLimitedError, Scheduler, UpstreamError
+from common.llm_stub_server import StubConfig, serve_in_thread
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Start a stub server and point the gateway at it; yields a function taking StubConfig kwargs"""
+    servers = []
+
+    def start(**kwargs):
+        config = StubConfig(**kwargs)
+        server, base_url = serve_in_thread(config)
+        servers.append(server)
+        monkeypatch.setenv("GROQ_BASE_URL", base_url)
+        # A fresh key gives every test its own client and scheduler
+        return config, f"test-{uuid.uuid4().hex}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_retry_after_is_honoured(stub):
+    config, api_key = stub(ttft="fixed:0", response_tokens=5, tokens_per_second=1000,
+                           requests_per_minute=1, window_seconds=0.5)
+    llm_gateway.complete("first", api_key=api_key)
+    started = time.monotonic()
+    assert llm_gateway.complete("second", api_key=api_key)
+    scheduler = llm_gateway.get_scheduler("groq", api_key, llm_gateway.DEFAULT_MODEL)
+    assert config.stats["rate_limited"] >= 1
+    assert scheduler.stats["rate_limited"] >= 1
+    # The retry waited for the window the server announced instead of hammering it
+    assert time.monotonic() - started >= 0.3
+
+
+def test_server_errors_are_not_reported_as_rate_limits(stub):
+    _, api_key = stub(ttft="fixed:0", error_rate=1.0, error_status=503)
+    scheduler = llm_gateway.get_scheduler("groq", api_key, llm_gateway.DEFAULT_MODEL)
+    scheduler.max_retries = 1
+    with pytest.raises(UpstreamError) as raised:
+        llm_gateway.complete("hello", api_key=api_key)
+    assert not isinstance(raised.value, RateLimitedError)
+    assert "503" in str(raised.value)
+
+
+def test_identical_prompts_share_one_request(stub):
+    config, api_key = stub(ttft="fixed:0.3", response_tokens=5, tokens_per_second=1000)
+    answers = []
+    threads = [threading.Thread(target=lambda: answers.append(llm_gateway.complete("same", api_key=api_key)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(answers)) == 1 and len(answers) == 5
+    assert config.stats["requests"] == 1
+    assert llm_gateway.get_scheduler("groq", api_key, llm_gateway.DEFAULT_MODEL).stats["coalesced"] == 4
+
+
+def test_schedulers_are_per_model():
+    api_key = f"test-{uuid.uuid4().hex}"
+    assert llm_gateway.get_scheduler("groq", api_key, "a") is not llm_gateway.get_scheduler("groq", api_key, "b")
+
+
+def test_interactive_requests_are_admitted_first():
+    # 20 requests a second, paused while the queue fills up, so every admission waits its turn
+    scheduler = Scheduler(requests_per_minute=1200, tokens_per_minute=10**9)
+    scheduler.requests.level = 0
+    scheduler.paused_until = time.monotonic() + 0.2
+    order = []
+
+    def submit(name, priority):
+        scheduler.run(lambda: order.append(name), priority=priority)
+
+    threads = [threading.Thread(target=submit, args=(f"background-{i}", BACKGROUND)) for i in range(3)]
+    threads += [threading.Thread(target=submit, args=(f"interactive-{i}", INTERACTIVE)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+    assert order == [f"interactive-{i}" for i in range(3)] + [f"background-{i}" for i in range(3)]
+
+
+def test_queue_wait_is_bounded():
+    scheduler = Scheduler(requests_per_minute=1, tokens_per_minute=10**9, max_wait=0.2)
+    scheduler.requests.level = 0
+    started = time.monotonic()
+    with pytest.raises(RateLimitedError):
+        scheduler.run(lambda: "never", priority=BACKGROUND)
+    assert time.monotonic() - started < 1
+    assert scheduler.stats["timeouts"] == 1 and scheduler.stats["upstream"] == 0
+    assert not scheduler._queue
+
+
+def test_observed_usage_replaces_the_reservation():
+    scheduler = Scheduler(requests_per_minute=60, tokens_per_minute=6000)
+    scheduler.run(lambda: "answer", tokens=1000, usage=lambda result: 100)
+    assert scheduler.tokens.level == pytest.approx(5900, abs=5)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AI Farming Assistant App"))
+
+from location_index import get_location_index, load_cities  # noqa: E402
+
+
+def test_bundled_cities_resolve_under_offered_countries():
+    pytest.importorskip("pycountry")
+    index = get_location_index()
+    countries = set(index.countries())
+    for city in load_cities():
+        assert city["country"] in countries, city["label"]
+        assert index.resolve(f"{city['name']}, {city['country']}") is not None, city["label"]
@@ -0,0 +1,92 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AI Farming Assistant App"))
+
+from common import llm_gateway  # noqa: E402
+from common.llm_stub_server import StubConfig, serve_in_thread  # noqa: E402
+from memory_utils import ConversationMemory  # noqa: E402
+from token_utils import count_tokens  # noqa: E402
+
+
+def history(turns, words=60):
+    return [{"user": f"question {i} " + "about maize irrigation " * words,
+             "ai": f"answer {i} " + "water twice a week " * words} for i in range(turns)]
+
+
+class RecordingSummarizer:
+    """Stand-in LLM that returns a summary of a fixed length and records its calls"""
+
+    def __init__(self, words=20):
+        self.words = words
+        self.calls = []
+
+    def __call__(self, previous, turns):
+        self.calls.append((previous, len(turns)))
+        return " ".join(["summary"] * self.words)
+
+
+def test_short_conversation_is_not_summarized():
+    summarize = RecordingSummarizer()
+    memory = ConversationMemory(summarize, token_budget=3000)
+    messages = memory.build_messages("system", history(2, words=5), "next?")
+    assert not summarize.calls
+    assert len(messages) == 1 + 2 * 2 + 1
+
+
+def test_evicted_turns_are_summarized_once():
+    summarize = RecordingSummarizer()
+    memory = ConversationMemory(summarize, token_budget=1500, summary_budget=200)
+    turns = history(12)
+    messages = memory.build_messages("system", turns, "next?")
+    assert len(summarize.calls) == 1
+    assert summarize.calls[0] == ("", memory.summarized_turns)
+    assert "Summary of the earlier conversation" in messages[1]["content"]
+    # The next message reuses the summary while the window still has room
+    memory.build_messages("system", turns + history(1, words=1), "and then?")
+    assert len(summarize.calls) == 1
+
+
+def test_overlong_summary_is_condensed_then_cut():
+    summarize = RecordingSummarizer(words=2000)
+    memory = ConversationMemory(summarize, token_budget=1500, summary_budget=100)
+    memory.build_messages("system", history(12), "next?")
+    # One call for the evicted turns, one asking to condense the overlong summary on its own
+    assert len(summarize.calls) == 2 and summarize.calls[1][1] == 0
+    assert count_tokens(memory.summary) <= 100
+
+
+def test_messages_stay_within_budget():
+    memory = ConversationMemory(RecordingSummarizer(words=2000), token_budget=1500, summary_budget=100)
+    turns = history(30)
+    for end in range(1, len(turns)):
+        messages = memory.build_messages("system", turns[:end], "next?")
+        total = sum(count_tokens(m["content"]) for m in messages)
+        # Only the one turn that is always kept verbatim may exceed the budget
+        assert total <= 1500 + count_tokens(turns[end - 1]["user"] + turns[end - 1]["ai"])
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    config = StubConfig(ttft="fixed:0", tokens_per_second=100_000, response_tokens=600)
+    server, base_url = serve_in_thread(config)
+    monkeypatch.setenv("GROQ_BASE_URL", base_url)
+    yield config
+    server.shutdown()
+
+
+def test_summary_from_stub_llm_is_held_to_budget(stub_llm):
+    api_key = f"test-{uuid.uuid4().hex}"
+
+    def summarize(previous, turns):
+        transcript = "\n".join(f"User: {t['user']}\nAI: {t['ai']}" for t in turns)
+        return llm_gateway.complete(f"Summary so far: {previous}\n\n{transcript}", api_key=api_key)
+
+    memory = ConversationMemory(summarize, token_budget=1500, summary_budget=150)
+    messages = memory.build_messages("system", history(12), "next?")
+    assert stub_llm.stats["requests"] == 2
+    assert 0 < count_tokens(memory.summary) <= 150
+    assert memory.summary in messages[1]["content"]
@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "AI Farming Assistant App"))
+
+import weather_utils  # noqa: E402
+
+OPEN_METEO_BODY = {"current": {"pm10": 20.0, "pm2_5": 11.0, "ozone": 40.0,
+                               "nitrogen_dioxide": 5.0, "sulphur_dioxide": 1.0}}
+AIRVISUAL_BODY = {"data": {"current": {"pollution": {"p1": 30, "p2": 22, "o3": 9}}}}
+
+
+class Provider:
+    """A local air-quality endpoint answering after ``delay`` seconds with ``status``"""
+
+    def __init__(self, body, delay=0.0, status=200):
+        self.body, self.delay, self.status = body, delay, status
+        self.requests = 0
+        self.finished = threading.Event()
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                provider.requests += 1
+                time.sleep(provider.delay)
+                data = json.dumps(provider.body).encode()
+                self.send_response(provider.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                provider.finished.set()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Factory for (open-meteo, airvisual) endpoints; returns the provider list for first_valid_response"""
+    servers = []
+
+    def start(primary, backup):
+        servers.extend([primary, backup])
+        monkeypatch.setattr(weather_utils, "OPEN_METEO_AQ_URL", primary.url)
+        monkeypatch.setattr(weather_utils, "AIRVISUAL_URL", backup.url)
+        # Unique names keep the process-wide metrics of each test apart
+        suffix = uuid.uuid4().hex[:8]
+        return [(f"open-meteo-{suffix}", weather_utils.fetch_open_meteo_air_quality, (1.0, 2.0)),
+                (f"airvisual-{suffix}", weather_utils.fetch_airvisual_air_quality, (1.0, 2.0, "key"))]
+
+    yield start
+    for server in servers:
+        server.server.shutdown()
+
+
+def test_fast_primary_is_not_hedged(providers):
+    primary, backup = Provider(OPEN_METEO_BODY), Provider(AIRVISUAL_BODY)
+    result = weather_utils.first_valid_response(providers(primary, backup), hedge_delay=0.5)
+    assert result == OPEN_METEO_BODY
+    assert primary.requests == 1 and backup.requests == 0
+
+
+def test_slow_primary_is_hedged_by_the_backup(providers):
+    primary, backup = Provider(OPEN_METEO_BODY, delay=1.5), Provider(AIRVISUAL_BODY)
+    started = time.monotonic()
+    result = weather_utils.first_valid_response(providers(primary, backup), hedge_delay=0.1)
+    assert time.monotonic() - started < 1.0
+    assert result["current"]["pm2_5"] == 22
+    assert primary.requests == 1 and backup.requests == 1
+
+
+def test_failing_primary_starts_the_backup_without_waiting(providers):
+    primary, backup = Provider({"error": "down"}, status=500), Provider(AIRVISUAL_BODY)
+    started = time.monotonic()
+    result = weather_utils.first_valid_response(providers(primary, backup), hedge_delay=5)
+    assert time.monotonic() - started < 1.0
+    assert result["current"]["pm10"] == 30
+
+
+def test_losing_requests_are_cancelled_or_ignored(providers):
+    primary, backup = Provider(OPEN_METEO_BODY, delay=0.5), Provider(AIRVISUAL_BODY)
+    third = []
+    entries = providers(primary, backup) + [("never", lambda: third.append(1), ())]
+    result = weather_utils.first_valid_response(entries, hedge_delay=0.1)
+    assert result["current"]["pm2_5"] == 22
+    # The provider queued after the winner is never started
+    assert not third
+    # The primary was already in flight; it is left to finish in the background, its answer unused
+    assert primary.requests == 1
+    assert primary.finished.wait(2)
+
+
+def test_all_providers_failing_or_too_slow_returns_none(providers):
+    entries = providers(Provider({}, status=503), Provider({}, delay=2))
+    started = time.monotonic()
+    assert weather_utils.first_valid_response(entries, hedge_delay=0.05, timeout=0.5) is None
+    assert time.monotonic() - started < 1.5
+
+
+def test_metrics_record_latency_and_outcome(providers):
+    primary, backup = Provider({"error": "down"}, status=500, delay=0.1), Provider(AIRVISUAL_BODY)
+    entries = providers(primary, backup)
+    for _ in range(2):
+        weather_utils.first_valid_response(entries, hedge_delay=5)
+    metrics = weather_utils.get_provider_metrics()
+    failed, succeeded = metrics[entries[0][0]], metrics[entries[1][0]]
+    assert failed["calls"] == 2 and failed["success_rate"] == 0
+    assert failed["avg_latency"] >= 0.1
+    assert succeeded["calls"] == 2 and succeeded["success_rate"] == 1